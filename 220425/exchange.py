@@ -1,5 +1,8 @@
 import time
 import ccxt
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Optional
 import config
 import logging
 from decimal import Decimal, ROUND_DOWN
@@ -17,10 +20,22 @@ def get_active_account(account: str = "MAIN") -> dict:
         return account_config
     raise ValueError(f"Account '{account}' is not active or not configured.")
 
+def create_shared_session(pool_size: int = 32) -> requests.Session:
+    """
+    Returns a keep-alive requests session with a connection pool large enough
+    to be shared by every client in the process.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 class DeltaExchangeClient:
-    def __init__(self, account: str = "MAIN"):
+    def __init__(self, account: str = "MAIN", session: Optional[requests.Session] = None):
         """
         Initializes the DeltaExchangeClient with account-specific API credentials.
+        Pass a shared session to reuse warm connections across clients.
         """
         self.account = account
         account_config = get_active_account(account)
@@ -48,6 +63,8 @@ class DeltaExchangeClient:
                 'enableRateLimit': True,
                 'adjustForTimeDifference': True,
             })
+            if session is not None:
+                self.exchange.session = session
             logger.debug("DeltaExchangeClient initialized successfully for account %s.", account)
         except Exception as e:
             logger.error("Error initializing DeltaExchangeClient for account %s: %s", account, e)
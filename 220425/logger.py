@@ -1,5 +1,8 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import config
 
 # Ensure the log directory exists
@@ -7,11 +10,24 @@ log_dir = os.path.dirname(config.LOG_FILE)
 if log_dir and not os.path.exists(log_dir):
     os.makedirs(log_dir)
 
+_listener = None
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(_stop_listener)
+
 def setup_logging() -> logging.Logger:
     """
     Configures the root logger using settings from config.
     On startup, truncates the log file (deletes older logs) by opening with mode='w'.
+    Records are handed to a QueueListener thread so file and console I/O
+    stay off the trading loops.
     """
+    global _listener
     # Resolve log level
     log_level = getattr(logging, config.LOG_LEVEL.upper(), logging.INFO)
 
@@ -34,8 +50,14 @@ def setup_logging() -> logging.Logger:
     console_formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s')
     console_handler.setFormatter(console_formatter)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    _stop_listener()
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
     return logger
 
@@ -1,9 +1,12 @@
-import threading
+import asyncio
 import logging
 import signal
 import sys
 from logger import setup_logging
 from binance_ws import BinanceWebsocket
+from exchange import DeltaExchangeClient, create_shared_session
+from order_manager import OrderManager
+from trade_manager import TradeManager
 from profit_trailing import ProfitTrailing
 from signal_processor import SignalProcessor
 import config
@@ -19,19 +22,31 @@ def main() -> None:
     ws = BinanceWebsocket()
     ws.start()
 
-    # Profit trailing manager
-    pt_tracker = ProfitTrailing(ws_instance=ws, check_interval=getattr(config, 'PROFIT_CHECK_INTERVAL', 1))
-    pt_thread = threading.Thread(target=pt_tracker.track, daemon=True)
-    pt_thread.start()
-
-    # Signal processor
-    sp = SignalProcessor(ws_instance=ws, profit_trailing=pt_tracker)
-    sp_thread = threading.Thread(
-        target=sp.process_signals_loop,
-        kwargs={'sleep_interval': getattr(config, 'SIGNAL_POLL_INTERVAL', 5)},
-        daemon=True
+    # One exchange client on one pooled session, shared by every component
+    client = DeltaExchangeClient(session=create_shared_session())
+    order_manager = OrderManager(client)
+    trade_manager = TradeManager(client, order_manager)
+
+    pt_tracker = ProfitTrailing(
+        ws_instance=ws,
+        check_interval=getattr(config, 'PROFIT_CHECK_INTERVAL', 1),
+        client=client,
+        trade_manager=trade_manager
+    )
+    sp = SignalProcessor(
+        ws_instance=ws,
+        profit_trailing=pt_tracker,
+        order_manager=order_manager,
+        trade_manager=trade_manager
     )
-    sp_thread.start()
+
+    # Profit trailing and signal processing share one asyncio event loop;
+    # the websocket keeps its own thread.
+    async def run() -> None:
+        await asyncio.gather(
+            pt_tracker.track_async(),
+            sp.process_signals_async(sleep_interval=getattr(config, 'SIGNAL_POLL_INTERVAL', 5)),
+        )
 
     # Graceful shutdown handler
     def shutdown(signum, frame):
@@ -42,10 +57,8 @@ def main() -> None:
     signal.signal(signal.SIGINT, shutdown)
     signal.signal(signal.SIGTERM, shutdown)
 
-    # Keep the main thread alive on all platforms
-    stop_event = threading.Event()
     try:
-        stop_event.wait()
+        asyncio.run(run())
     except (KeyboardInterrupt, SystemExit):
         shutdown(None, None)
 
@@ -9,14 +9,14 @@ import config
 logger = logging.getLogger(__name__)
 
 class OrderManager:
-    def __init__(self) -> None:
+    def __init__(self, client: Optional[DeltaExchangeClient] = None) -> None:
         """
         Initialize the OrderManager with:
-          - an exchange client instance,
+          - an exchange client instance (shared if one is passed in),
           - a local order cache dictionary,
           - and a Redis client for persistent storage.
         """
-        self.client: DeltaExchangeClient = DeltaExchangeClient()
+        self.client: DeltaExchangeClient = client or DeltaExchangeClient()
         self.orders: Dict[Any, Dict[str, Any]] = {}  # Local cache for orders.
         self.redis_client = redis.Redis(
             host=config.REDIS_HOST,
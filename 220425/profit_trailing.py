@@ -1,35 +1,80 @@
 # profit_trailing.py
 
+import asyncio
+import itertools
+import sys
 import time
 import logging
+from collections import namedtuple
+from dataclasses import dataclass
+import numpy as np
 from typing import Dict, Any, List, Optional, Tuple
 from exchange import DeltaExchangeClient
 import config
 from trade_manager import TradeManager
-from profit_trailing_rules import fixed_stop
+from profit_trailing_rules import fixed_stop, fixed_stop_array
 
 logger = logging.getLogger(__name__)
 
+# shared stand-in for a missing 'info' dict; read-only
+_EMPTY: Dict[str, Any] = {}
+
+@dataclass(slots=True, frozen=True)
+class ParsedPosition:
+    """
+    Position fields parsed once per fetch so the tracking loop works on
+    plain floats instead of re-reading the raw exchange dict every tick.
+    """
+    symbol: str
+    key: str
+    id: int
+    entry: float
+    size: float
+    sign: int
+    info: Dict[str, Any]
+
+# Fixed-point (x100) snapshot of a position's log row. Prices are quantized to
+# cents so sub-cent float noise between ticks does not trigger a new log line.
+Display = namedtuple("Display", "entry live profit_pct sl rule target size side")
+
 class ProfitTrailing:
     """
     Monitors open positions and updates trailing stops using live price updates
     from a shared BinanceWebsocket instance.
     """
-    def __init__(self, ws_instance, check_interval: int = 1) -> None:
+    def __init__(
+        self,
+        ws_instance,
+        check_interval: int = 1,
+        client: Optional[DeltaExchangeClient] = None,
+        trade_manager: Optional[TradeManager] = None
+    ) -> None:
         self.ws = ws_instance
-        self.client = DeltaExchangeClient()
-        self.trade_manager = TradeManager()
+        self.client = client or DeltaExchangeClient()
+        self.trade_manager = trade_manager or TradeManager(self.client)
         self.check_interval: int = check_interval
-        self.position_trailing_stop: Dict[Any, float] = {}
+        self.position_trailing_stop: Dict[int, float] = {}
         self.last_had_positions: bool = True
         self.last_position_fetch_time: float = 0.0
+        # start time of the fetch behind cached_positions, 0.0 if that fetch failed;
+        # stamped only once the positions are stored so readers never see a newer
+        # timestamp with older positions
+        self.last_successful_fetch_time: float = 0.0
+        self._fetch_ok_at: float = 0.0
         self.position_fetch_interval: int = 5
-        self.cached_positions: List[Dict[str, Any]] = []
-        self.last_display: Dict[Any, Dict[str, Any]] = {}
-        self.position_max_profit: Dict[Any, float] = {}
+        self.cached_positions: List[ParsedPosition] = []
+        self.last_display: Dict[int, Display] = {}
+        self.position_max_profit: Dict[int, float] = {}
+        # small-int ids for position keys; the state dicts above are keyed by id
+        self._key_to_id: Dict[str, int] = {}
+        self._id_counter = itertools.count()
         self.take_profit_detected: bool = False
         self.target_long: Optional[float] = None
         self.target_short: Optional[float] = None
+        # per-position columns, row i matching cached_positions[i]; rebuilt on each fetch
+        self._arrays: Dict[str, np.ndarray] = self._build_arrays([])
+        # (price, tp flag, targets) of the last evaluated tick; None forces a re-evaluation
+        self._last_tick_state: Optional[Tuple[Any, ...]] = None
 
     def set_zone_limits(
         self,
@@ -44,75 +89,62 @@ class ProfitTrailing:
         self.target_long = supply_max
         self.target_short = demand_min
 
-    def fetch_open_positions(self) -> List[Dict[str, Any]]:
+    def fetch_open_positions(self) -> List[ParsedPosition]:
+        started = time.time()
+        self._fetch_ok_at = 0.0
         try:
             positions = self.client.fetch_positions()
-            open_positions: List[Dict[str, Any]] = []
+            open_positions: List[ParsedPosition] = []
             for pos in positions:
+                info = pos.get('info') or _EMPTY
+                entry_val = info.get('entry_price') or pos.get('entryPrice')
+                size_val = pos.get('size') or pos.get('contracts')
+                # validate once here so the per-tick math needs no guards
                 try:
-                    size = float(pos.get('size') or pos.get('contracts') or 0)
-                except Exception:
-                    size = 0.0
-                if size != 0:
-                    sym = pos.get('info', {}).get('product_symbol') or pos.get('symbol', '')
-                    if sym and config.SYMBOL in sym:
-                        open_positions.append(pos)
+                    entry = float(entry_val)
+                    size = float(size_val or 0)
+                except (TypeError, ValueError):
+                    continue
+                if size == 0 or entry <= 0:
+                    continue
+                sym = info.get('product_symbol') or pos.get('symbol', '')
+                if sym and config.SYMBOL in sym:
+                    key = sys.intern(f"{sym}_{entry_val}_{size_val}")
+                    pos_id = self._key_to_id.get(key)
+                    if pos_id is None:
+                        pos_id = self._key_to_id[key] = next(self._id_counter)
+                    open_positions.append(ParsedPosition(
+                        symbol=sym,
+                        key=key,
+                        id=pos_id,
+                        entry=entry,
+                        size=size,
+                        sign=1 if size > 0 else -1,
+                        info=info
+                    ))
+            live_keys = {pp.key for pp in open_positions}
+            for key in [k for k in self._key_to_id if k not in live_keys]:
+                del self._key_to_id[key]
+            self._fetch_ok_at = started
             return open_positions
         except Exception as e:
             logger.error("Error fetching open positions: %s", e)
             return []
 
-    def compute_profit_pct(self, pos: Dict[str, Any], live_price: float) -> Optional[float]:
-        entry = pos.get('info', {}).get('entry_price') or pos.get('entryPrice')
-        try:
-            entry = float(entry)
-        except Exception:
-            return None
-        try:
-            size = float(pos.get('size') or pos.get('contracts') or 0)
-        except Exception:
-            size = 0.0
-        if size > 0:
-            return (live_price - entry) / entry
-        else:
-            return (entry - live_price) / entry
-
-    def compute_raw_profit(self, pos: Dict[str, Any], live_price: float) -> Optional[float]:
-        entry = pos.get('info', {}).get('entry_price') or pos.get('entryPrice')
-        try:
-            entry = float(entry)
-        except Exception:
-            return None
-        try:
-            size = float(pos.get('size') or pos.get('contracts') or 0)
-        except Exception:
-            size = 0.0
-        if size > 0:
-            return (live_price - entry) * size
-        else:
-            return (entry - live_price) * abs(size)
-
     def update_trailing_stop(
         self,
-        pos: Dict[str, Any],
+        pp: ParsedPosition,
         live_price: float
     ) -> Tuple[Optional[float], Optional[float], Optional[str]]:
-        pos_symbol = pos.get('info', {}).get('product_symbol') or pos.get('symbol', 'unknown')
-        entry_val = pos.get('info', {}).get('entry_price') or pos.get('entryPrice')
-        size_val  = pos.get('size') or pos.get('contracts')
-        key = f"{pos_symbol}_{entry_val}_{size_val}"
-
-        try:
-            entry = float(entry_val)
-            size  = float(size_val or 0)
-        except Exception:
-            return None, None, None
+        pos_id = pp.id
+        entry = pp.entry
+        size = pp.size
 
         # compute and store max profit (absolute)
-        current_profit = (live_price - entry) if size > 0 else (entry - live_price)
-        prev_max = self.position_max_profit.get(key, 0)
+        current_profit = pp.sign * (live_price - entry)
+        prev_max = self.position_max_profit.get(pos_id, 0)
         new_max  = max(prev_max, current_profit)
-        self.position_max_profit[key] = new_max
+        self.position_max_profit[pos_id] = new_max
 
         # choose rule
         if self.take_profit_detected:
@@ -127,23 +159,67 @@ class ProfitTrailing:
         else:
             new_trailing, rule = fixed_stop(entry, size)
 
-        self.position_trailing_stop[key] = new_trailing
+        self.position_trailing_stop[pos_id] = new_trailing
         profit_pct = new_max / entry if entry else None
         return new_trailing, profit_pct, rule
 
-    def book_profit(self, pos: Dict[str, Any], live_price: float) -> bool:
-        pos_symbol = pos.get('info', {}).get('product_symbol') or pos.get('symbol', 'unknown')
-        entry_val = pos.get('info', {}).get('entry_price') or pos.get('entryPrice')
-        size_val  = pos.get('size') or pos.get('contracts')
-        key = f"{pos_symbol}_{entry_val}_{size_val}"
-        try:
-            size = float(pos.get('size') or pos.get('contracts') or 0)
-        except Exception:
-            size = 0.0
+    def _build_arrays(self, positions: List[ParsedPosition]) -> Dict[str, np.ndarray]:
+        n = len(positions)
+        arrays = {
+            "entry": np.empty(n),
+            "size": np.empty(n),
+            "sign": np.empty(n),
+            "max_profit": np.zeros(n),
+            "trailing": np.empty(n),
+        }
+        for i, pp in enumerate(positions):
+            arrays["entry"][i] = pp.entry
+            arrays["size"][i] = pp.size
+            arrays["sign"][i] = pp.sign
+            arrays["max_profit"][i] = self.position_max_profit.get(pp.id, 0)
+        return arrays
+
+    def update_all(self, live_price: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorised update_trailing_stop over every cached position.
+        Returns (current_profit, trailing_stop, lock_90 mask) arrays.
+        """
+        a = self._arrays
+        entry, sign, max_profit = a["entry"], a["sign"], a["max_profit"]
+
+        current_profit = sign * (live_price - entry)
+        np.maximum(max_profit, current_profit, out=max_profit)
+
+        locked = np.zeros(entry.shape[0], dtype=bool)
+        if self.take_profit_detected:
+            trailing = entry.copy()
+        else:
+            if self.target_long is not None and live_price >= self.target_long:
+                locked |= sign > 0
+            if self.target_short is not None and live_price <= self.target_short:
+                locked |= sign < 0
+            trailing = np.where(locked, entry + sign * 0.9 * max_profit, fixed_stop_array(entry, sign))
+        a["trailing"] = trailing
+        return current_profit, trailing, locked
+
+    def book_profit(
+        self,
+        pp: ParsedPosition,
+        live_price: float,
+        trailing_stop: Optional[float] = None,
+        rule: Optional[str] = None
+    ) -> bool:
+        """
+        Close the position if price crossed the trailing stop. Callers that
+        already ran update_trailing_stop this tick pass its result in.
+        """
+        key = pp.key
+        size = pp.size
 
-        trailing_stop, _, rule = self.update_trailing_stop(pos, live_price)
         if trailing_stop is None:
-            return False
+            trailing_stop, _, rule = self.update_trailing_stop(pp, live_price)
+            if trailing_stop is None:
+                return False
 
         should_close = (live_price < trailing_stop) if size > 0 else (live_price > trailing_stop)
         if should_close:
@@ -161,96 +237,100 @@ class ProfitTrailing:
 
         return False
 
-    def track(self) -> None:
+    def _store_positions(self, positions: List[ParsedPosition]) -> bool:
         """
-        Main loop to monitor positions and update trailing stops.
+        Cache a fresh position fetch. Returns False when there is nothing to track.
         """
-        # wait for price
-        wait = 0
-        while self.ws.current_price is None and wait < 30:
-            logger.info("Waiting for live price update...")
-            time.sleep(2)
-            wait += 2
+        self.cached_positions = positions
+        self.last_successful_fetch_time = self._fetch_ok_at
+        if not positions:
+            if self.last_had_positions:
+                logger.info("No open positions. Profit trailing paused.")
+                self.last_had_positions = False
+            self.position_trailing_stop.clear()
+            self.position_max_profit.clear()
+            return False
+        # drop state for positions that are no longer open so the dicts do not grow
+        live_ids = {pp.id for pp in positions}
+        for state in (self.position_max_profit, self.position_trailing_stop, self.last_display):
+            for pos_id in [k for k in state if k not in live_ids]:
+                del state[pos_id]
+        self._arrays = self._build_arrays(positions)
+        self._last_tick_state = None
+        if not self.last_had_positions:
+            logger.info("Open positions detected. Profit trailing resumed.")
+            self.last_had_positions = True
+        return True
 
-        if self.ws.current_price is None:
-            logger.warning("Live price not available. Exiting profit trailing tracker.")
-            return
+    def invalidate_positions(self) -> None:
+        """
+        Mark cached_positions as untrusted, e.g. after an order was placed.
+        """
+        self.last_successful_fetch_time = 0.0
 
-        while True:
-            now = time.time()
-            if now - self.last_position_fetch_time >= self.position_fetch_interval:
-                self.cached_positions = self.fetch_open_positions()
-                self.last_position_fetch_time = now
-
-                if not self.cached_positions:
-                    if self.last_had_positions:
-                        logger.info("No open positions. Profit trailing paused.")
-                        self.last_had_positions = False
-                    self.position_trailing_stop.clear()
-                    self.position_max_profit.clear()
-                    time.sleep(self.check_interval)
-                    continue
-                else:
-                    if not self.last_had_positions:
-                        logger.info("Open positions detected. Profit trailing resumed.")
-                        self.last_had_positions = True
+    def _positions_due(self) -> bool:
+        now = time.time()
+        if now - self.last_position_fetch_time >= self.position_fetch_interval:
+            self.last_position_fetch_time = now
+            return True
+        return False
 
-            live_price = self.ws.current_price
-            if live_price is None:
-                time.sleep(self.check_interval)
-                continue
+    def _evaluate_positions(self, live_price: float) -> List[Tuple[ParsedPosition, float, str]]:
+        """
+        Update trailing stops and log changes for every cached position.
+        Returns (position, trailing_stop, rule) for each position whose stop was hit;
+        booking is left to the caller so the async loop can run it off the event loop.
+        """
+        to_close: List[Tuple[ParsedPosition, float, str]] = []
+        if not self.cached_positions:
+            return to_close
 
-            for pos in self.cached_positions:
-                try:
-                    entry_num = float(pos.get('info', {}).get('entry_price') or pos.get('entryPrice'))
-                except Exception:
-                    entry_num = None
-                try:
-                    size = float(pos.get('size') or pos.get('contracts') or 0)
-                except Exception:
-                    size = 0.0
-                if size == 0:
-                    continue
+        # stops and display rows are a function of these inputs and the positions,
+        # so an unchanged tick cannot produce anything new
+        tick_state = (live_price, self.take_profit_detected, self.target_long, self.target_short)
+        if tick_state == self._last_tick_state:
+            return to_close
 
-                profit_pct = self.compute_profit_pct(pos, live_price) or 0
-                profit_display = profit_pct * 100
-                raw_profit = self.compute_raw_profit(pos, live_price) or 0
-                profit_usd = raw_profit / 1000
+        current_profit, trailing, locked = self.update_all(live_price)
+        if self.take_profit_detected:
+            rules = ["breakeven"] * len(self.cached_positions)
+        else:
+            rules = ["lock_90" if lk else "fixed_stop" for lk in locked.tolist()]
+        rows = zip(
+            self.cached_positions,
+            current_profit.tolist(),
+            self._arrays["max_profit"].tolist(),
+            trailing.tolist(),
+            rules,
+        )
+        for pp, profit, max_profit, trailing_stop, rule in rows:
+            key = pp.key
+            entry_num = pp.entry
+            size = pp.size
+            self.position_max_profit[pp.id] = max_profit
+            self.position_trailing_stop[pp.id] = trailing_stop
 
-                trailing_stop, _, rule = self.update_trailing_stop(pos, live_price)
-                # use consistent key logic
-                pos_symbol = pos.get('info', {}).get('product_symbol') or pos.get('symbol', 'unknown')
-                entry_val  = pos.get('info', {}).get('entry_price') or pos.get('entryPrice')
-                size_val   = pos.get('size') or pos.get('contracts')
-                key        = f"{pos_symbol}_{entry_val}_{size_val}"
-                max_profit = self.position_max_profit.get(key, 0)
+            profit_display = profit / entry_num * 100
+            profit_usd = profit * abs(size) / 1000
 
-                try:
-                    api_pnl   = float(pos.get('info', {}).get('unrealized_pnl') or 0)
-                    api_entry = float(pos.get('info', {}).get('entry_price') or 0)
-                except Exception:
-                    api_pnl = api_entry = 0.0
-
-                side   = "long" if size > 0 else "short"
-                target = self.target_long if size > 0 else self.target_short
-                target_str = f"{target:.2f}" if target is not None else "N/A"
-
-                display = {
-                    "entry": entry_num,
-                    "api_entry": round(api_entry, 2),
-                    "live": live_price,
-                    "profit_pct": round(profit_display, 2),
-                    "profit_usd": round(profit_usd, 2),
-                    "api_pnl": round(api_pnl, 2),
-                    "rule": rule,
-                    "sl": round(trailing_stop or 0, 2),
-                    "target": target_str,
-                    "size": size,
-                    "side": side,
-                    "max_profit": round(max_profit, 2)
-                }
-
-                if self.last_display.get(key) != display:
+            side   = "long" if size > 0 else "short"
+            target = self.target_long if size > 0 else self.target_short
+
+            display = Display(
+                int(entry_num * 100),
+                int(live_price * 100),
+                int(profit_display * 100),
+                int((trailing_stop or 0) * 100),
+                rule,
+                target,
+                int(size),
+                side
+            )
+
+            if self.last_display.get(pp.id) != display:
+                self.last_display[pp.id] = display
+                if logger.isEnabledFor(logging.INFO):
+                    target_str = f"{target:.2f}" if target is not None else "N/A"
                     logger.info(
                         "Order: %s | Size: %.0f (%s) | Entry: %.2f | Live: %.2f | PnL: %.2f%% | USD: %.2f | "
                         "Max Profit: %.2f | Rule: %s | SL: %.2f | Target: %s",
@@ -258,12 +338,53 @@ class ProfitTrailing:
                         profit_display, profit_usd, max_profit,
                         rule, trailing_stop or 0, target_str
                     )
-                    self.last_display[key] = display
 
-                try:
-                    if self.book_profit(pos, live_price):
-                        logger.info("Profit booked for order %s.", key)
-                except Exception as e:
-                    logger.error("Error booking profit for %s: %s", key, e)
+            should_close = (live_price < trailing_stop) if size > 0 else (live_price > trailing_stop)
+            if should_close:
+                to_close.append((pp, trailing_stop, rule))
+        # keep re-evaluating while a stop is hit so a failed close is retried
+        self._last_tick_state = None if to_close else tick_state
+        return to_close
+
+    def _book(self, pp: ParsedPosition, live_price: float, trailing_stop: float, rule: str) -> None:
+        try:
+            if self.book_profit(pp, live_price, trailing_stop, rule):
+                logger.info("Profit booked for order %s.", pp.key)
+        except Exception as e:
+            logger.error("Error booking profit for %s: %s", pp.key, e)
+
+    def track(self) -> None:
+        """
+        Blocking entry point for callers without an event loop; runs track_async().
+        """
+        asyncio.run(self.track_async())
+
+    async def track_async(self) -> None:
+        """
+        Main loop to monitor positions and update trailing stops.
+        Blocking REST calls (position fetch, closing orders) run in the default
+        executor so the loop stays free for the signal consumer.
+        """
+        wait = 0
+        while self.ws.current_price is None and wait < 30:
+            logger.info("Waiting for live price update...")
+            await asyncio.sleep(2)
+            wait += 2
+
+        if self.ws.current_price is None:
+            logger.warning("Live price not available. Exiting profit trailing tracker.")
+            return
+
+        while True:
+            if self._positions_due():
+                positions = await asyncio.to_thread(self.fetch_open_positions)
+                if not self._store_positions(positions):
+                    await asyncio.sleep(self.check_interval)
+                    continue
+
+            live_price = self.ws.current_price
+            if live_price is not None:
+                for pp, trailing_stop, rule in self._evaluate_positions(live_price):
+                    await asyncio.to_thread(self._book, pp, live_price, trailing_stop, rule)
 
-            time.sleep(self.check_interval)
+            await asyncio.sleep(self.check_interval)
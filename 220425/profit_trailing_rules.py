@@ -1,16 +1,33 @@
 # profit_trailing_rules.py
 
 import config
+import numpy as np
 from typing import Tuple
 
+# FIXED_STOP_OFFSET_PERCENT as a fraction; call reload_config() after changing config.
+_OFFSET_RATIO = config.FIXED_STOP_OFFSET_PERCENT * 0.01
+
+def reload_config() -> None:
+    """
+    Refresh the cached offset ratio from config.
+    """
+    global _OFFSET_RATIO
+    _OFFSET_RATIO = config.FIXED_STOP_OFFSET_PERCENT * 0.01
+
 def fixed_stop(entry: float, size: float) -> Tuple[float, str]:
     """
     Always fall back to a fixed‐offset stop.
     """
-    offset = entry * (config.FIXED_STOP_OFFSET_PERCENT / 100)
+    offset = entry * _OFFSET_RATIO
     trailing = entry - offset if size > 0 else entry + offset
     return trailing, "fixed_stop"
 
+def fixed_stop_array(entry: np.ndarray, sign: np.ndarray) -> np.ndarray:
+    """
+    fixed_stop over arrays of entries and position signs (+1 long, -1 short).
+    """
+    return entry - sign * entry * _OFFSET_RATIO
+
 def lock_50_rule(entry: float, size: float, max_profit: float) -> Tuple[float, str]:
     """
     Once TP has been signaled and profit >= threshold,
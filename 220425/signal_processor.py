@@ -1,14 +1,56 @@
+import asyncio
+import re
 import time
-import json
+import orjson
 import redis
+import redis.asyncio as aioredis
 import logging
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Callable, Dict, List
 from order_manager import OrderManager
 from trade_manager import TradeManager
 import config
 
 logger = logging.getLogger(__name__)
 
+# shared stand-in for a missing "info" dict; read-only
+_EMPTY: Dict[str, Any] = {}
+
+_WORD_RE = re.compile(r"[a-z]+")
+_BUY_WORDS = frozenset(("buy", "long"))
+_SELL_WORDS = frozenset(("sell", "short"))
+_ENTRY_WORDS = frozenset(("short", "buy", "long"))
+
+# Entry/SL offset percentages as fractions; call reload_config() after changing config.
+_ENTRY_RATIO = config.ORDER_ENTRY_OFFSET_PERCENT * 0.01
+_SL_RATIO = config.ORDER_SL_OFFSET_PERCENT * 0.01
+
+def reload_config() -> None:
+    """
+    Refresh the cached offset ratios from config.
+    """
+    global _ENTRY_RATIO, _SL_RATIO
+    _ENTRY_RATIO = config.ORDER_ENTRY_OFFSET_PERCENT * 0.01
+    _SL_RATIO = config.ORDER_SL_OFFSET_PERCENT * 0.01
+
+def _wait_until(predicate: Callable[[], bool], timeout: float = 2.0, initial: float = 0.02) -> bool:
+    """
+    Poll predicate with exponential backoff until it returns True or timeout
+    seconds have passed. Returns whether the predicate was satisfied.
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.2)
+        try:
+            if predicate():
+                return True
+        except Exception as e:
+            logger.debug("Wait predicate raised: %s", e)
+
 class SignalProcessor:
     """
     Processes trading signals from Redis and executes order actions.
@@ -16,71 +58,115 @@ class SignalProcessor:
     If a ProfitTrailing instance is provided, its take_profit_detected flag is updated
     when a take profit signal is detected.
     """
-    def __init__(self, ws_instance, profit_trailing: Optional[Any] = None) -> None:
+    def __init__(
+        self,
+        ws_instance,
+        profit_trailing: Optional[Any] = None,
+        order_manager: Optional[OrderManager] = None,
+        trade_manager: Optional[TradeManager] = None
+    ) -> None:
         self.ws = ws_instance
         self.profit_trailing = profit_trailing
-        self.order_manager = OrderManager()
-        self.trade_manager = TradeManager()
+        self.order_manager = order_manager or OrderManager()
+        self.trade_manager = trade_manager or TradeManager(self.order_manager.client, self.order_manager)
         self.redis_client = redis.Redis(
             host=config.REDIS_HOST,
             port=config.REDIS_PORT,
             db=config.REDIS_DB
         )
         self.last_signal: Optional[Dict[str, Any]] = None
+        # raw payload of the last decoded signal, to skip re-parsing identical pushes
+        self._last_raw_signal: Optional[bytes] = None
         self.last_executed_side: Optional[str] = None
 
-    def fetch_signal(self, key: str = "BTCUSDT_signal") -> Optional[Dict[str, Any]]:
+    def fetch_signal(self, key: str = "BTCUSDT_signal", only_new: bool = False) -> Optional[Dict[str, Any]]:
         try:
             data = self.redis_client.lindex(key, -1)
             if not data:
                 return None
-            if isinstance(data, bytes):
-                data = data.decode("utf-8")
-            return json.loads(data)
+            if only_new:
+                return self._decode_new_signal(data)
+            return self._decode_signal(data)
         except Exception as e:
             logger.error("Error fetching signal from Redis: %s", e)
             return None
 
-    def cancel_conflicting_orders(self, symbol: str, new_side: str) -> None:
+    @staticmethod
+    def _decode_signal(data: Any) -> Dict[str, Any]:
+        # orjson accepts both bytes and str payloads
+        return orjson.loads(data)
+
+    def _decode_new_signal(self, data: Any) -> Optional[Dict[str, Any]]:
+        """
+        Decode data unless it is byte-identical to the last payload seen,
+        in which case None is returned without parsing.
+        """
+        if not data or data == self._last_raw_signal:
+            return None
+        signal_data = self._decode_signal(data)
+        self._last_raw_signal = data
+        return signal_data
+
+    def _snapshot_open_orders(self, symbol: str) -> Optional[List[Dict[str, Any]]]:
         try:
-            orders = self.order_manager.client.exchange.fetch_open_orders(symbol)
-            if orders:
-                for order in orders:
-                    if order.get("status", "").lower() != "open":
-                        continue
-                    order_side = order.get("side", "").lower()
-                    if new_side == "" or order_side != new_side.lower():
-                        try:
-                            self.order_manager.client.cancel_order(order["id"], symbol)
-                            logger.info("Canceled conflicting order: %s", order["id"])
-                        except Exception as e:
-                            logger.error("Error canceling order %s: %s", order["id"], e)
+            return self.order_manager.client.exchange.fetch_open_orders(symbol)
         except Exception as e:
             logger.error("Error fetching open orders: %s", e)
+            return None
 
-    def cancel_same_side_orders(self, symbol: str, side: str) -> None:
-        try:
-            pending_orders = self.order_manager.client.exchange.fetch_open_orders(symbol)
-            for order in pending_orders:
-                if order.get("side", "").lower() == side.lower() and order.get("status", "").lower() == "open":
-                    try:
-                        self.order_manager.client.cancel_order(order["id"], symbol)
-                        logger.info("Canceled same-side order: %s", order["id"])
-                    except Exception as e:
-                        logger.error("Error canceling same-side order %s: %s", order["id"], e)
-        except Exception as e:
-            logger.error("Error fetching same-side pending orders: %s", e)
+    def cancel_open_orders(self, symbol: str, new_side: str, orders: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Cancel every open order on symbol in a single pass, logging whether each
+        was on the same side as new_side or conflicting with it.
+        """
+        if orders is None:
+            orders = self._snapshot_open_orders(symbol)
+        for order in orders or []:
+            if order.get("status", "").lower() != "open":
+                continue
+            reason = "same-side" if order.get("side", "").lower() == new_side.lower() else "conflicting"
+            try:
+                self.order_manager.client.cancel_order(order["id"], symbol)
+                logger.info("Canceled %s order: %s", reason, order["id"])
+            except Exception as e:
+                logger.error("Error canceling %s order %s: %s", reason, order["id"], e)
 
-    def open_pending_order_exists(self, symbol: str, side: str) -> bool:
-        try:
-            orders = self.order_manager.client.exchange.fetch_open_orders(symbol)
-            for order in orders:
-                if order.get("side", "").lower() == side.lower() and order.get("status", "").lower() == "open":
-                    return True
-            return False
-        except Exception as e:
-            logger.error("Error checking for pending orders: %s", e)
-            return False
+    def _position_closed(self, symbol: str, sign: int) -> bool:
+        """
+        True once no position on symbol has the given sign (1 long, -1 short).
+        """
+        for pos in self.order_manager.client.fetch_positions():
+            pos_symbol = (pos.get("info") or _EMPTY).get("product_symbol") or pos.get("symbol") or ""
+            if symbol not in pos_symbol:
+                continue
+            size = float(pos.get("size") or pos.get("contracts") or 0)
+            if size * sign > 0:
+                return False
+        return True
+
+    def _orders_cleared(self, symbol: str) -> bool:
+        return not any(
+            o.get("status", "").lower() == "open"
+            for o in self.order_manager.client.exchange.fetch_open_orders(symbol)
+        )
+
+    def _opposite_position_possible(self, tokens: set) -> bool:
+        """
+        Use the profit trailer's position cache to tell whether a position
+        opposite to the signal may be open. Returns True (fetch to be sure)
+        when there is no trailer or its last successful fetch is not fresh.
+        """
+        pt = self.profit_trailing
+        if pt is None or not pt.last_successful_fetch_time:
+            return True
+        if time.time() - pt.last_successful_fetch_time > pt.position_fetch_interval:
+            return True
+        closes_short = "buy" in tokens
+        closes_long = not _SELL_WORDS.isdisjoint(tokens)
+        for pp in pt.cached_positions:
+            if (closes_short and pp.size < 0) or (closes_long and pp.size > 0):
+                return True
+        return False
 
     def signals_are_different(self, new_signal: Dict[str, Any], old_signal: Optional[Dict[str, Any]]) -> bool:
         new_text = new_signal.get("last_signal", {}).get("text", "").strip().lower()
@@ -105,9 +191,10 @@ class SignalProcessor:
 
         last_signal = signal_data.get("last_signal", {})
         signal_text = last_signal.get("text", "").lower()
+        tokens = set(_WORD_RE.findall(signal_text))
 
         # 1) Skip TP signals entirely
-        if "take profit" in signal_text or "tp" in signal_text:
+        if "tp" in tokens or ("take" in tokens and "profit" in tokens):
             logger.info("Take profit signal — no new order should be placed.")
             if self.profit_trailing:
                 self.profit_trailing.take_profit_detected = True
@@ -120,15 +207,18 @@ class SignalProcessor:
         raw_price = last_signal.get("price")
         supply_zone = signal_data.get("supply_zone", {})
         demand_zone = signal_data.get("demand_zone", {})
+        # older producers published zone bounds as strings ("" when absent)
         raw_supply_max = supply_zone.get("max")
+        raw_supply_max = float(raw_supply_max) if raw_supply_max not in (None, "") else None
         raw_demand_min = demand_zone.get("min")
+        raw_demand_min = float(raw_demand_min) if raw_demand_min not in (None, "") else None
         valid_position = signal_data.get("valid_position")
 
         if self.profit_trailing:
             try:
                 self.profit_trailing.set_zone_limits(
-                    supply_max=float(raw_supply_max) if raw_supply_max else None,
-                    demand_min=float(raw_demand_min) if raw_demand_min else None,
+                    supply_max=raw_supply_max,
+                    demand_min=raw_demand_min,
                     full_supply_zone=supply_zone,
                     full_demand_zone=demand_zone
                 )
@@ -145,45 +235,46 @@ class SignalProcessor:
         else:
             raw_price = float(raw_price)
 
-        if valid_position is not True and ("short" in signal_text or "buy" in signal_text or "long" in signal_text):
+        if valid_position is not True and not _ENTRY_WORDS.isdisjoint(tokens):
             logger.info("Signal has valid_position=false — skipping entry.")
             return None
 
         try:
-            positions = self.order_manager.client.fetch_positions()
+            positions = self.order_manager.client.fetch_positions() if self._opposite_position_possible(tokens) else []
             for pos in positions:
-                pos_symbol = pos.get("info", {}).get("product_symbol") or pos.get("symbol")
+                pos_symbol = (pos.get("info") or _EMPTY).get("product_symbol") or pos.get("symbol")
                 if pos_symbol and "BTCUSD" in pos_symbol:
                     try:
                         pos_size = float(pos.get("size") or pos.get("contracts") or 0)
                     except Exception:
                         pos_size = 0.0
-                    if "buy" in signal_text and pos_size < 0:
+                    if "buy" in tokens and pos_size < 0:
                         logger.info("Opposite signal: closing short before buy.")
                         self.trade_manager.place_market_order("BTCUSD", "buy", abs(pos_size),
                                                              params={"time_in_force": "ioc"}, force=True)
-                        time.sleep(2)
-                    elif ("sell" in signal_text or "short" in signal_text) and pos_size > 0:
+                        _wait_until(lambda: self._position_closed("BTCUSD", -1))
+                    elif not _SELL_WORDS.isdisjoint(tokens) and pos_size > 0:
                         logger.info("Opposite signal: closing long before sell.")
                         self.trade_manager.place_market_order("BTCUSD", "sell", pos_size,
                                                              params={"time_in_force": "ioc"}, force=True)
-                        time.sleep(2)
+                        _wait_until(lambda: self._position_closed("BTCUSD", 1))
         except Exception as e:
             logger.error("Error handling opposite positions: %s", e)
 
         # 2) Determine side explicitly
-        if "buy" in signal_text or "long" in signal_text:
+        if not _BUY_WORDS.isdisjoint(tokens):
             side = "buy"
-        elif "sell" in signal_text or "short" in signal_text:
+        elif not _SELL_WORDS.isdisjoint(tokens):
             side = "sell"
         else:
             logger.warning("Unable to determine side for '%s' — skipping.", signal_text)
             return None
 
         # 3) Cancel and reset any existing orders
-        self.cancel_conflicting_orders("BTCUSD", side)
-        self.cancel_same_side_orders("BTCUSD", side)
-        time.sleep(2)
+        orders = self._snapshot_open_orders("BTCUSD")
+        self.cancel_open_orders("BTCUSD", side, orders)
+        if orders:
+            _wait_until(lambda: self._orders_cleared("BTCUSD"))
 
         if self.order_manager.has_open_position("BTCUSD", side):
             logger.info("Open %s position exists. Skipping new order.", side)
@@ -191,11 +282,11 @@ class SignalProcessor:
 
         # 4) Compute entry and SL
         if side == "buy":
-            entry_price = raw_price - (raw_price * (config.ORDER_ENTRY_OFFSET_PERCENT / 100))
-            sl_price = float(raw_demand_min) if raw_demand_min else raw_price - (raw_price * (config.ORDER_SL_OFFSET_PERCENT / 100))
+            entry_price = raw_price - raw_price * _ENTRY_RATIO
+            sl_price = raw_demand_min if raw_demand_min else raw_price - raw_price * _SL_RATIO
         else:
-            entry_price = raw_price + (raw_price * (config.ORDER_ENTRY_OFFSET_PERCENT / 100))
-            sl_price = float(raw_supply_max) if raw_supply_max else raw_price + (raw_price * (config.ORDER_SL_OFFSET_PERCENT / 100))
+            entry_price = raw_price + raw_price * _ENTRY_RATIO
+            sl_price = raw_supply_max if raw_supply_max else raw_price + raw_price * _SL_RATIO
 
         logger.info("Signal: %s | Entry: %.2f | SL: %.2f", last_signal.get("text"), entry_price, sl_price)
 
@@ -204,6 +295,9 @@ class SignalProcessor:
             limit_order = self.order_manager.place_order("BTCUSD", side, config.QUANTITY, entry_price,
                                                          params={"time_in_force": "gtc"})
             logger.info("Limit order placed: %s", limit_order)
+            if self.profit_trailing:
+                # the order may fill before the trailer's next fetch
+                self.profit_trailing.invalidate_positions()
         except Exception as e:
             logger.error("Failed to place limit order: %s", e)
             return None
@@ -227,18 +321,73 @@ class SignalProcessor:
             logger.error("Failed to attach bracket: %s", e)
             return None
 
-    def process_signals_loop(self, sleep_interval: int = 5) -> None:
-        logger.info("Starting signal processing loop...")
-        while True:
-            signal_data = self.fetch_signal()
-            if signal_data and self.signals_are_different(signal_data, self.last_signal):
-                logger.info("New signal detected.")
-                processed = self.process_signal(signal_data)
-                if processed:
-                    logger.info("Order processed successfully: %s", processed)
-                else:
-                    logger.info("Signal processing skipped or failed.")
-                self.last_signal = signal_data
+    def _handle_signal(self, signal_data: Optional[Dict[str, Any]]) -> None:
+        if signal_data and self.signals_are_different(signal_data, self.last_signal):
+            logger.info("New signal detected.")
+            processed = self.process_signal(signal_data)
+            if processed:
+                logger.info("Order processed successfully: %s", processed)
             else:
-                logger.debug("No new signal or signal identical to last one.")
-            time.sleep(sleep_interval)
+                logger.info("Signal processing skipped or failed.")
+            self.last_signal = signal_data
+        else:
+            logger.debug("No new signal or signal identical to last one.")
+
+    def process_signals_loop(self, sleep_interval: int = 5, key: str = "BTCUSDT_signal") -> None:
+        """
+        Blocking entry point for callers without an event loop; runs
+        process_signals_async() until it returns.
+        """
+        asyncio.run(self.process_signals_async(sleep_interval, key))
+
+    async def process_signals_async(self, sleep_interval: int = 5, key: str = "BTCUSDT_signal") -> None:
+        """
+        Wait for signals published on the "<key>_channel" pub/sub channel.
+        The list at <key> is still read on startup and whenever no message
+        arrives within sleep_interval, so a missed publish is picked up.
+        Uses redis.asyncio for the subscription; process_signal() still makes
+        blocking exchange calls, so it is run in the default executor.
+        """
+        logger.info("Starting async signal processing loop...")
+        channel = f"{key}_channel"
+        client = aioredis.Redis(
+            host=config.REDIS_HOST,
+            port=config.REDIS_PORT,
+            db=config.REDIS_DB
+        )
+
+        async def fetch_latest() -> Optional[Dict[str, Any]]:
+            try:
+                data = await client.lindex(key, -1)
+                return self._decode_new_signal(data)
+            except Exception as e:
+                logger.error("Error fetching signal from Redis: %s", e)
+                return None
+
+        await asyncio.to_thread(self._handle_signal, await fetch_latest())
+        try:
+            while True:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                try:
+                    await pubsub.subscribe(channel)
+                    while True:
+                        message = await pubsub.get_message(timeout=sleep_interval)
+                        if message and message.get("type") == "message":
+                            try:
+                                signal_data = self._decode_new_signal(message["data"])
+                            except Exception as e:
+                                logger.error("Error decoding published signal: %s", e)
+                                continue
+                        else:
+                            signal_data = await fetch_latest()
+                        await asyncio.to_thread(self._handle_signal, signal_data)
+                except Exception as e:
+                    logger.error("Signal subscription error on %s: %s", channel, e)
+                    await asyncio.sleep(sleep_interval)
+                finally:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+        finally:
+            await client.aclose()
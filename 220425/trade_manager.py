@@ -15,9 +15,13 @@ class TradeManager:
     Manages trade execution by placing market orders and monitoring trailing stops.
     Includes verification that market orders actually fill or close positions.
     """
-    def __init__(self) -> None:
-        self.client: DeltaExchangeClient = DeltaExchangeClient()
-        self.order_manager: OrderManager = OrderManager()
+    def __init__(
+        self,
+        client: Optional[DeltaExchangeClient] = None,
+        order_manager: Optional[OrderManager] = None
+    ) -> None:
+        self.client: DeltaExchangeClient = client or DeltaExchangeClient()
+        self.order_manager: OrderManager = order_manager or OrderManager(self.client)
         self.highest_price: Optional[float] = None
         # Redis (if needed for signals)
         self.redis_client = redis.Redis(
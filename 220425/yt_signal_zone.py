@@ -6,49 +6,84 @@ import time
 import redis
 import json
 import threading
+import queue
 import torch
 import warnings
 import sys
 import re
+from contextlib import nullcontext
 
 warnings.filterwarnings("ignore", message="RNN module weights are not part of single contiguous chunk")
 
 r = redis.Redis(host='localhost', port=6379, db=0)
 BTC_URL = "https://www.youtube.com/live/jkP1Sw7M2iU"
-reader = easyocr.Reader(['en'])
+USE_CUDA = torch.cuda.is_available()
+reader = easyocr.Reader(['en'], gpu=USE_CUDA, cudnn_benchmark=True)
 
-SUPPLY_HSV = ((54, 78, 38), (66, 174, 82))
-DEMAND_HSV = ((2, 135, 47), (12, 252, 130))
-KERNEL = np.ones((5, 5), np.uint8)
+SUPPLY_LO, SUPPLY_HI = np.array((54, 78, 38), np.uint8), np.array((66, 174, 82), np.uint8)
+DEMAND_LO, DEMAND_HI = np.array((2, 135, 47), np.uint8), np.array((12, 252, 130), np.uint8)
+SIGNAL_OCR_SCALE = 0.5  # signal labels are large; OCR the signal ROI at half size
+OCR_BATCH_SIZE = 16  # recognizer crops per forward pass
+SIGNAL_HISTORY = 1000  # entries kept in the <symbol>_signal list
+KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+
+# 1.5 * identity - 0.5 * 3x3 Gaussian: the unsharp mask as a single filter2D kernel
+_GAUSS_3 = cv2.getGaussianKernel(3, 0)
+UNSHARP = -0.5 * (_GAUSS_3 @ _GAUSS_3.T).astype(np.float32)
+UNSHARP[1, 1] += 1.5
 
 def flatten_rnn(ocr_reader):
-    if not hasattr(ocr_reader, "model"):
+    # EasyOCR keeps its recognizer (which holds the LSTMs) on .recognizer
+    model = getattr(ocr_reader, "recognizer", None) or getattr(ocr_reader, "model", None)
+    if model is None:
         return
-    for module in ocr_reader.model.modules():
+    for module in model.modules():
         if isinstance(module, (torch.nn.RNN, torch.nn.LSTM, torch.nn.GRU)):
             module.flatten_parameters()
 
+# weight layout does not change after load, so once is enough
+flatten_rnn(reader)
+
+def ocr_batch(images, width, height):
+    # fp16 autocast on GPU; EasyOCR builds fp32 input tensors, so the models
+    # are not .half()-converted directly
+    amp = torch.autocast("cuda", dtype=torch.float16) if USE_CUDA else nullcontext()
+    with torch.inference_mode(), amp:
+        return reader.readtext_batched(images, n_width=width, n_height=height,
+                                       batch_size=OCR_BATCH_SIZE, workers=0, paragraph=False, detail=1)
+
+def round_up_32(n):
+    return (n + 31) // 32 * 32
+
+def pad_to(img, height, width):
+    # pad bottom/right only so OCR box coordinates stay in the original frame
+    return cv2.copyMakeBorder(img, 0, height - img.shape[0], 0, width - img.shape[1],
+                              cv2.BORDER_CONSTANT, value=0)
+
+# The longer phrases ("take profit", "buy signal", "short singal", ...) all
+# contain one of these keywords, so matching the keywords is equivalent.
+_RE_TP = re.compile(r"take|tp", re.I)
+_RE_BUY = re.compile(r"buy|long", re.I)
+_RE_SHORT = re.compile(r"sell|short", re.I)
+
 def parse_trading_signal(text):
-    lower_text = text.lower()
-    for key in ["take profit", "take", "tp"]:
-        if key in lower_text:
-            return "Take Profit"
-    for key in ["buy signal", "long signal", "long singal", "buy/long", "buy", "long"]:
-        if key in lower_text:
-            return "Buy Signal"
-    for key in ["sell/short", "sell signal", "short signal", "short singal", "sell", "short"]:
-        if key in lower_text:
-            return "Short Signal"
+    if _RE_TP.search(text):
+        return "Take Profit"
+    if _RE_BUY.search(text):
+        return "Buy Signal"
+    if _RE_SHORT.search(text):
+        return "Short Signal"
     return None
 
+_PRICE_STRIP = str.maketrans('', '', ',$')
+
 def parse_price_label(text):
-    clean = text.replace(',', '').replace('$', '').strip().lower()
-    if clean.endswith('k'):
-        try:
-            return float(clean[:-1]) * 1000
-        except ValueError:
-            return None
+    clean = text.translate(_PRICE_STRIP).strip()
+    if not clean:
+        return None
     try:
+        if clean[-1] in 'kK':
+            return float(clean[:-1]) * 1000
         return float(clean)
     except ValueError:
         return None
@@ -56,18 +91,25 @@ def parse_price_label(text):
 def is_valid_btc_price(p):
     return 10000 < p < 100000
 
-def get_closest_price(y_coord, price_list):
-    if not price_list:
-        return ""
-    closest = min(price_list, key=lambda p: abs(p[0] - y_coord))
-    return closest[1]
-
-def detect_zone_bounds(hsv_img, lower_hsv, upper_hsv):
-    mask = cv2.inRange(hsv_img, np.array(lower_hsv), np.array(upper_hsv))
-    cleaned = cv2.morphologyEx(mask, cv2.MORPH_OPEN, KERNEL)
-    cleaned = cv2.morphologyEx(cleaned, cv2.MORPH_CLOSE, KERNEL)
-    ys = np.where(cleaned > 0)[0]
-    return (int(np.min(ys)), int(np.max(ys))) if len(ys) > 0 else (None, None)
+def get_closest_price(y_coord, ys, vals):
+    if not ys.size:
+        return None
+    return float(vals[np.argmin(np.abs(ys - y_coord))])
+
+def zone_rows(hsv_img, lo, hi):
+    """
+    Per-row flags (uint8[h]) marking rows that contain the zone colour.
+    The 2-D open/close is kept so isolated candle pixels of a similar hue
+    do not widen the zone.
+    """
+    mask = cv2.inRange(hsv_img, lo, hi)
+    cv2.morphologyEx(mask, cv2.MORPH_OPEN, KERNEL, dst=mask)
+    cleaned = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, KERNEL, dst=mask)
+    return cv2.reduce(cleaned, 1, cv2.REDUCE_MAX).ravel()
+
+def detect_zone_bounds(hsv_img, lo, hi):
+    ys = np.flatnonzero(zone_rows(hsv_img, lo, hi))
+    return (int(ys[0]), int(ys[-1])) if ys.size else (None, None)
 
 class YouTubeStream:
     def __init__(self, url):
@@ -80,6 +122,7 @@ class YouTubeStream:
             info = ydl.extract_info(self.url, download=False)
             direct_url = info["url"]
         self.cap = cv2.VideoCapture(direct_url)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
     def read_frame(self):
         if not self.cap or not self.cap.isOpened():
@@ -90,73 +133,141 @@ class YouTubeStream:
         if self.cap:
             self.cap.release()
 
+class FrameGrabber:
+    """
+    Keeps the decoder draining the stream on its own thread and holds only
+    the latest decoded frame, so OCR never works on a stale buffered frame.
+    """
+    def __init__(self, stream, retrieve_interval=0.5):
+        self.stream = stream
+        self.retrieve_interval = retrieve_interval
+        self.frames = queue.Queue(maxsize=1)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="FrameGrabber", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+
+    def _publish(self, item):
+        # drop the unread frame, if any, in favour of the newer one
+        try:
+            self.frames.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            self.frames.put_nowait(item)
+        except queue.Full:
+            pass
+
+    def _run(self):
+        cap = self.stream.cap
+        last_retrieve = 0.0
+        while not self._stop_event.is_set():
+            if not cap.grab():
+                self._publish((False, None))
+                self._stop_event.wait(5)
+                continue
+            now = time.monotonic()
+            if now - last_retrieve >= self.retrieve_interval:
+                self._publish(cap.retrieve())
+                last_retrieve = now
+
+    def read(self, timeout=15):
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return False, None
+
 def stream_worker(url, symbol):
     current_signal_type = None
     last_known_signal = {"text": "", "price": "", "coordinates": ""}
+    warm_shape = None
+
+    # Text of the last pushed signal; primed once from Redis, then tracked locally
+    try:
+        raw = r.lindex(f"{symbol}_signal", -1)
+        last_text = json.loads(raw).get("last_signal", {}).get("text", "") if raw else ""
+    except Exception:
+        last_text = ""
 
     while True:
+        grabber = None
         try:
             stream = YouTubeStream(url)
             stream.connect()
+            grabber = FrameGrabber(stream).start()
             retry_count = 0
 
             while True:
-                ret, frame = stream.read_frame()
+                ret, frame = grabber.read()
                 if not ret or frame is None:
                     retry_count += 1
                     if retry_count >= 5:
                         break
-                    time.sleep(5)
                     continue
                 retry_count = 0
 
                 h, w = frame.shape[:2]
                 x0 = int(w * 0.70)
                 roi = frame[:, x0:]
-                gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
                 hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-                flatten_rnn(reader)
+                # V channel (max of B,G,R) stands in for grayscale: coloured labels on a dark chart
+                gray = cv2.resize(cv2.extractChannel(hsv, 2), None,
+                                  fx=SIGNAL_OCR_SCALE, fy=SIGNAL_OCR_SCALE, interpolation=cv2.INTER_AREA)
 
-                # OCR for signals
-                ocr_results = reader.readtext(gray)
-                y_min_s, y_max_s = detect_zone_bounds(hsv, *SUPPLY_HSV)
-                y_min_d, y_max_d = detect_zone_bounds(hsv, *DEMAND_HSV)
+                y_min_s, y_max_s = detect_zone_bounds(hsv, SUPPLY_LO, SUPPLY_HI)
+                y_min_d, y_max_d = detect_zone_bounds(hsv, DEMAND_LO, DEMAND_HI)
 
-                # OCR for price scale
+                # Price scale strip
                 scale_bar_region = frame[:, int(w * 0.90):]
                 scale_gray = cv2.cvtColor(scale_bar_region, cv2.COLOR_BGR2GRAY)
-                sharp = cv2.addWeighted(scale_gray, 1.5, cv2.GaussianBlur(scale_gray, (3, 3), 0), -0.5, 0)
+                sharp = cv2.filter2D(scale_gray, cv2.CV_8U, UNSHARP)
                 _, thresh = cv2.threshold(sharp, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
 
-                ocr_price_data = reader.readtext(thresh)
-                price_map = []
+                # OCR signals and price scale in one batched forward pass
+                H = round_up_32(max(gray.shape[0], thresh.shape[0]))
+                W = round_up_32(max(gray.shape[1], thresh.shape[1]))
+                if warm_shape != (H, W):
+                    ocr_batch(np.zeros([2, H, W, 3], dtype=np.uint8), W, H)
+                    warm_shape = (H, W)
+                ocr_results, ocr_price_data = ocr_batch(
+                    [pad_to(gray, H, W), pad_to(thresh, H, W)], W, H
+                )
+                ys_list, vals_list = [], []
                 for (bbox, text, _) in ocr_price_data:
-                    y = int(bbox[0][1])
                     val = parse_price_label(text)
                     if val and is_valid_btc_price(val):
-                        price_map.append((y, val))
+                        ys_list.append(int(bbox[0][1]))
+                        vals_list.append(val)
+                price_ys = np.asarray(ys_list, np.int32)
+                price_vals = np.asarray(vals_list, np.float64)
 
                 # Build zones
-                supply_zone = {"min": "", "max": ""}
-                if y_min_s is not None and y_max_s is not None and price_map:
-                    min_p = get_closest_price(y_max_s, price_map)
-                    max_p = get_closest_price(y_min_s, price_map)
+                supply_zone = {"min": None, "max": None}
+                if y_min_s is not None and y_max_s is not None and price_ys.size:
+                    min_p = get_closest_price(y_max_s, price_ys, price_vals)
+                    max_p = get_closest_price(y_min_s, price_ys, price_vals)
                     if min_p and max_p:
-                        supply_zone = {"min": str(min_p), "max": str(max_p)}
+                        supply_zone = {"min": min_p, "max": max_p}
 
-                demand_zone = {"min": "", "max": ""}
-                if y_min_d is not None and y_max_d is not None and price_map:
-                    min_p = get_closest_price(y_max_d, price_map)
-                    max_p = get_closest_price(y_min_d, price_map)
+                demand_zone = {"min": None, "max": None}
+                if y_min_d is not None and y_max_d is not None and price_ys.size:
+                    min_p = get_closest_price(y_max_d, price_ys, price_vals)
+                    max_p = get_closest_price(y_min_d, price_ys, price_vals)
                     if min_p and max_p:
-                        demand_zone = {"min": str(min_p), "max": str(max_p)}
+                        demand_zone = {"min": min_p, "max": max_p}
 
                 # Detect latest signal
                 all_signals = []
                 for bbox, txt, _ in ocr_results:
                     tl, _, _, _ = bbox
-                    abs_x = int(tl[0] + x0)
-                    abs_y = int(tl[1])
+                    abs_x = int(tl[0] / SIGNAL_OCR_SCALE + x0)
+                    abs_y = int(tl[1] / SIGNAL_OCR_SCALE)
                     fixed = parse_trading_signal(txt.strip())
                     if fixed:
                         all_signals.append({"x": abs_x, "y": abs_y, "text": fixed})
@@ -191,28 +302,30 @@ def stream_worker(url, symbol):
                     "valid_position": valid_position
                 }
 
-                # Compare with last pushed signal text
-                try:
-                    raw = r.lindex(f"{symbol}_signal", -1)
-                    last_text = json.loads(raw).get("last_signal", {}).get("text", "") if raw else ""
-                except Exception:
-                    last_text = ""
-
                 # Only push on change
                 if aggregated["last_signal"]["text"] != last_text:
                     try:
-                        r.rpush(f"{symbol}_signal", json.dumps(aggregated))
+                        payload = json.dumps(aggregated)
+                        pipe = r.pipeline(transaction=False)
+                        pipe.rpush(f"{symbol}_signal", payload)
+                        pipe.ltrim(f"{symbol}_signal", -SIGNAL_HISTORY, -1)
+                        pipe.publish(f"{symbol}_signal_channel", payload)
+                        pipe.execute()
+                        last_text = aggregated["last_signal"]["text"]
                         print(f"[{symbol}] →", aggregated)
                     except Exception as e:
                         print(f"Redis write error for {symbol}:", e)
 
                 time.sleep(10)
 
+            grabber.stop()
             stream.release()
             time.sleep(5)
 
         except Exception:
             time.sleep(5)
+            if grabber is not None:
+                grabber.stop()
             if 'stream' in locals():
                 stream.release()
 
@@ -15,6 +15,7 @@ class BinanceWebsocket:
         self.ws_app = None
         self._stop_event = threading.Event()
         self._lock = threading.Lock()
+        self._price_event = threading.Event()  # set whenever current_price changes
 
     def _on_message(self, ws, message):
         try:
@@ -24,12 +25,27 @@ class BinanceWebsocket:
                 return
             price = float(data["p"])
             with self._lock:
+                changed = price != self.current_price
                 self.current_price = price
                 self.last_update_time = time.time()
+            if changed:
+                self._price_event.set()
             self.logger.debug("Received price update: %s", price)
         except Exception as e:
             self.logger.error("Error processing message: %s", e)
 
+    def wait_for_price(self, timeout=None):
+        """
+        Block until current_price changes or timeout seconds pass.
+        Returns True if the price changed. The event is cleared as soon as the
+        wait is satisfied, before the caller reads the new price, so a change
+        that lands after that read wakes the next call instead of being lost.
+        """
+        if not self._price_event.wait(timeout):
+            return False
+        self._price_event.clear()
+        return True
+
     def _on_error(self, ws, error):
         self.logger.error("WebSocket error: %s", error)
 
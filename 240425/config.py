@@ -7,6 +7,10 @@ load_dotenv()
 
 
 ORDER_INFO_KEY = os.getenv("ORDER_INFO_KEY", "order_info")
+# Compare signals by a cached (text, supply, demand) tuple; set False for the field-by-field check
+SIGNAL_FINGERPRINT = os.getenv("SIGNAL_FINGERPRINT", "True").lower() == "true"
+# "queue": one consumer pops <key>_queue; "pubsub": any number of consumers subscribe to <key>_chan
+SIGNAL_DELIVERY = os.getenv("SIGNAL_DELIVERY", "queue").lower()
 
 # ---- Trading defaults ----
 TRADING_SYMBOL = os.getenv("TRADING_SYMBOL", "BTCUSD")
@@ -144,6 +144,26 @@ class DeltaExchangeClient:
             logger.error("Error canceling order %s for %s: %s", order_id, symbol, e)
             raise
 
+    def cancel_orders_batch(self, order_ids: list, symbol: str) -> dict:
+        """
+        Cancels several orders for one product in a single request
+        (DELETE /orders/batch).
+        """
+        request_body = {
+            "product_symbol": symbol,
+            "orders": [{"id": oid} for oid in order_ids]
+        }
+        try:
+            if hasattr(self.exchange, 'privateDeleteOrdersBatch'):
+                result = self.exchange.privateDeleteOrdersBatch(request_body)
+            else:
+                result = self.exchange.request('orders/batch', 'private', 'DELETE', request_body)
+            logger.debug("Orders canceled in batch: %s", result)
+            return result
+        except Exception as e:
+            logger.error("Error batch-canceling orders %s for %s: %s", order_ids, symbol, e)
+            raise
+
     def create_order(self, symbol: str, order_type: str, side: str, amount: float, price: float = None, params: dict = None) -> dict:
         """
         Creates an order of the specified type; if a price is provided, it is quantized.
@@ -50,7 +50,7 @@ def main() -> None:
     # Now start the ongoing loops:
 
     sp_thread = threading.Thread(
-        target=sp.process_signals_loop,
+        target=sp.process_signals_pubsub if config.SIGNAL_DELIVERY == "pubsub" else sp.process_signals_loop,
         kwargs={'sleep_interval': getattr(config, 'SIGNAL_POLL_INTERVAL', 5)},
         daemon=True
     )
@@ -1,10 +1,10 @@
 import logging
 import time
-import json
-import redis
 from typing import Any, Dict, Optional
 from exchange import DeltaExchangeClient
+from utils import dumps
 import config
+import redis_pool
 
 logger = logging.getLogger(__name__)
 
@@ -18,11 +18,7 @@ class OrderManager:
         """
         self.client: DeltaExchangeClient = DeltaExchangeClient()
         self.orders: Dict[Any, Dict[str, Any]] = {}  # Local cache for orders.
-        self.redis_client = redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            db=config.REDIS_DB
-        )
+        self.redis_client = redis_pool.client()
         self.list_key = f"{config.SYMBOL}_orders"
         self.max_redis_entries = int(getattr(config, 'MAX_REDIS_ENTRIES', 1000))
 
@@ -31,7 +27,7 @@ class OrderManager:
         Store or update the order info in Redis list, trimming to a fixed size.
         """
         try:
-            data = json.dumps(order_info)
+            data = dumps(order_info)
             self.redis_client.rpush(self.list_key, data)
             # Trim list to last max entries
             self.redis_client.ltrim(self.list_key, -self.max_redis_entries, -1)
@@ -86,7 +82,8 @@ class OrderManager:
         """
         try:
             order = self.client.create_limit_order(symbol, side, amount, price, params)
-            order_id = order.get('id') or int(time.time() * 1000)
+            now_ms = time.time_ns() // 1_000_000
+            order_id = order.get('id') or now_ms
             order_info = {
                 'id': order_id,
                 'symbol': symbol,
@@ -95,7 +92,7 @@ class OrderManager:
                 'price': price,
                 'params': params or {},
                 'status': order.get('status', 'open'),
-                'timestamp': order.get('timestamp', int(time.time() * 1000))
+                'timestamp': order.get('timestamp', now_ms)
             }
             self.orders[order_id] = order_info
             self._store_order(order_info)
@@ -122,7 +119,7 @@ class OrderManager:
                     'product_symbol': product_symbol,
                     'params': bracket_params,
                     'status': exchange_order.get('state', 'open'),
-                    'timestamp': exchange_order.get('created_at', int(time.time() * 1000000))
+                    'timestamp': exchange_order.get('created_at', time.time_ns() // 1_000)
                 }
                 self.orders[order_id] = updated_order
 
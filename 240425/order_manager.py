@@ -1,10 +1,11 @@
 import logging
 import time
-import json
-import redis
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
 from exchange import DeltaExchangeClient
+from utils import dumps
 import config
+import redis_pool
 
 logger = logging.getLogger(__name__)
 
@@ -13,31 +14,58 @@ class OrderManager:
         """
         Initialize the OrderManager with:
           - an exchange client instance,
-          - a local order cache dictionary,
+          - a bounded local order cache (oldest entries evicted first),
           - and a Redis client for persistent storage.
         """
         self.client: DeltaExchangeClient = DeltaExchangeClient()
-        self.orders: Dict[Any, Dict[str, Any]] = {}  # Local cache for orders.
-        self.redis_client = redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            db=config.REDIS_DB
-        )
+        self.orders: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()  # Local cache for orders.
+        self.max_cache = int(getattr(config, 'ORDER_CACHE_MAX', 2048))
+        self.redis_client = redis_pool.client()
         # List to store normalized order info
         self.list_key = f"{config.SYMBOL}_orders"
         # List to record raw API responses on place/cancel
         self.order_info_key = config.ORDER_INFO_KEY
+        # Writes are queued here and sent in one round trip by _flush()
+        self._pipe = self.redis_client.pipeline(transaction=False)
+
+    def _cache_order(self, order_id: Any, order_info: Dict[str, Any]) -> None:
+        """
+        Insert or refresh an order in the local cache, evicting the least
+        recently written entries beyond max_cache. Redis keeps the full history.
+        """
+        self.orders[order_id] = order_info
+        self.orders.move_to_end(order_id)
+        while len(self.orders) > self.max_cache:
+            self.orders.popitem(last=False)
+
+    def _queue_record(self, list_key: str, record: Dict[str, Any]) -> None:
+        """
+        Queue an append to list_key, trimmed to the last 1000 entries.
+        """
+        self._pipe.rpush(list_key, dumps(record))
+        self._pipe.ltrim(list_key, -1000, -1)
+
+    def _flush(self) -> None:
+        """
+        Send all queued Redis writes in a single pipeline round trip.
+        """
+        try:
+            self._pipe.execute()
+        except Exception as e:
+            logger.error("Error writing orders to Redis: %s", e)
+            self._pipe.reset()
 
     def _store_order(self, order_info: Dict[str, Any]) -> None:
         """
         Store or update the order info in Redis using its order ID,
-        trimming to the last 1000 entries.
+        trimming to the last 1000 entries. Flushes any writes queued
+        earlier in the same call along with it.
         """
         try:
-            self.redis_client.rpush(self.list_key, json.dumps(order_info))
-            self.redis_client.ltrim(self.list_key, -1000, -1)
+            self._queue_record(self.list_key, order_info)
         except Exception as e:
             logger.error("Error storing order in Redis: %s", e)
+        self._flush()
 
     def is_order_open(self, symbol: str, side: str) -> bool:
         """
@@ -59,13 +87,17 @@ class OrderManager:
                 return True
         return False
 
-    def has_open_position(self, symbol: str, side: str) -> bool:
+    def has_open_position(self, symbol: str, side: str,
+                          positions: Optional[List[Dict[str, Any]]] = None) -> bool:
         """
         Determines if there is an actual open position for the given symbol and side.
         For 'buy' positions, size > 0 and for 'sell' positions, size < 0.
+        Pass positions to reuse an earlier fetch_positions() result.
         """
         try:
-            for pos in self.client.fetch_positions():
+            if positions is None:
+                positions = self.client.fetch_positions()
+            for pos in positions:
                 pos_symbol = pos.get('info', {}).get('product_symbol') or pos.get('symbol', '')
                 if symbol not in pos_symbol:
                     continue
@@ -98,15 +130,15 @@ class OrderManager:
             # 1) Call the exchange
             api_response = self.client.create_limit_order(symbol, side, amount, price, params)
 
-            # 2) Record raw API response
+            # 2) Record raw API response (sent with the normalized info below)
             try:
-                self.redis_client.rpush(self.order_info_key, json.dumps(api_response))
-                self.redis_client.ltrim(self.order_info_key, -1000, -1)
+                self._queue_record(self.order_info_key, api_response)
             except Exception as e:
                 logger.error("Error recording order API response to Redis: %s", e)
 
-            # 3) Build our normalized order info
-            order_id = api_response.get('id') or int(time.time() * 1000)
+            # 3) Build our normalized order info, stamped once
+            now_ms = time.time_ns() // 1_000_000
+            order_id = api_response.get('id') or now_ms
             order_info = {
                 'id': order_id,
                 'symbol': symbol,
@@ -115,9 +147,9 @@ class OrderManager:
                 'price': price,
                 'params': params or {},
                 'status': api_response.get('status', 'open'),
-                'timestamp': api_response.get('timestamp', int(time.time() * 1000))
+                'timestamp': api_response.get('timestamp', now_ms)
             }
-            self.orders[order_id] = order_info
+            self._cache_order(order_id, order_info)
 
             # 4) Store normalized info
             self._store_order(order_info)
@@ -154,9 +186,9 @@ class OrderManager:
                     'product_symbol': product_symbol,
                     'params': bracket_params,
                     'status': exchange_order.get('state', 'open'),
-                    'timestamp': exchange_order.get('created_at', int(time.time() * 1000000))
+                    'timestamp': exchange_order.get('created_at', time.time_ns() // 1_000)
                 }
-                self.orders[order_id] = updated_order
+                self._cache_order(order_id, updated_order)
 
             self._store_order(updated_order)
             logger.debug("Bracket attached to order %s: %s", order_id, updated_order)
@@ -194,16 +226,17 @@ class OrderManager:
             # 1) Cancel via exchange
             api_response = self.client.cancel_order(order_id, symbol)
 
-            # 2) Record raw cancel response
+            # 2) Record raw cancel response (sent with the normalized info below)
             try:
-                self.redis_client.rpush(self.order_info_key, json.dumps(api_response))
-                self.redis_client.ltrim(self.order_info_key, -1000, -1)
+                self._queue_record(self.order_info_key, api_response)
             except Exception as e:
                 logger.error("Error recording cancel API response to Redis: %s", e)
 
             # 3) Update normalized info
             order['status'] = 'canceled'
             self._store_order(order)
+            # terminal: nothing left to look up locally
+            self.orders.pop(order_id, None)
             logger.debug("Canceled order %s: %s", order_id, api_response)
             return api_response
 
@@ -1,5 +1,6 @@
 import time
 import logging
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 from exchange import DeltaExchangeClient
 import config
@@ -8,6 +9,19 @@ from profit_trailing_rules import fixed_stop
 
 logger = logging.getLogger(__name__)
 
+# (symbol, entry, size): identifies a position in the state dicts
+PosKey = Tuple[str, float, float]
+
+@dataclass(slots=True)
+class Pos:
+    """
+    An open position parsed once per fetch; key identifies it in the state dicts.
+    """
+    symbol: str
+    entry: float
+    size: float
+    key: PosKey
+
 class ProfitTrailing:
     """
     Monitors open positions and updates trailing stops using live price updates
@@ -20,9 +34,9 @@ class ProfitTrailing:
         self.check_interval: int = check_interval
 
         # state
-        self.position_trailing_stop: Dict[str, float] = {}
-        self.position_max_profit: Dict[str, float] = {}
-        self.last_display: Dict[str, Dict[str, Any]] = {}
+        self.position_trailing_stop: Dict[PosKey, float] = {}
+        self.position_max_profit: Dict[PosKey, float] = {}
+        self.last_display: Dict[PosKey, Tuple[Any, ...]] = {}
         self.take_profit_detected: bool = False
 
         # zone targets
@@ -33,7 +47,7 @@ class ProfitTrailing:
         self.last_had_positions: bool = True
         self.last_position_fetch_time: float = 0.0
         self.position_fetch_interval: int = 5
-        self.cached_positions: List[Dict[str, Any]] = []
+        self.cached_positions: List[Pos] = []
 
     def set_zone_limits(
         self,
@@ -50,50 +64,43 @@ class ProfitTrailing:
         # use ASCII arrow to avoid UnicodeEncodeError in Windows consoles
         logger.info("Zones primed -> target_long=%s, target_short=%s", supply_max, demand_max)
 
-    def fetch_open_positions(self) -> List[Dict[str, Any]]:
+    def fetch_open_positions(self) -> List[Pos]:
         try:
             positions = self.client.fetch_positions()
-            open_positions: List[Dict[str, Any]] = []
+            open_positions: List[Pos] = []
             for pos in positions:
+                info = pos.get('info', {})
+                symbol = info.get('product_symbol') or pos.get('symbol', '')
+                if config.SYMBOL not in symbol:
+                    continue
                 try:
-                    size = float(pos.get('size') or pos.get('contracts') or 0)
+                    entry = float(info.get('entry_price') or pos.get('entryPrice'))
+                    size  = float(pos.get('size') or pos.get('contracts') or 0)
                 except Exception:
-                    size = 0.0
+                    continue
                 if size == 0:
                     continue
-                symbol = pos.get('info', {}).get('product_symbol') or pos.get('symbol', '')
-                if config.SYMBOL in symbol:
-                    open_positions.append(pos)
+                open_positions.append(Pos(symbol, entry, size, (symbol, entry, size)))
             return open_positions
         except Exception as e:
             logger.error("Error fetching open positions: %s", e)
             return []
 
-    def compute_profit_pct(self, pos: Dict[str, Any], live_price: float) -> Optional[float]:
-        try:
-            entry = float(pos.get('info', {}).get('entry_price') or pos.get('entryPrice'))
-            size  = float(pos.get('size') or pos.get('contracts') or 0)
-        except Exception:
-            return None
-        if size > 0:
-            return (live_price - entry) / entry
+    def compute_profit_pct(self, pos: Pos, live_price: float) -> float:
+        if pos.size > 0:
+            return (live_price - pos.entry) / pos.entry
         else:
-            return (entry - live_price) / entry
+            return (pos.entry - live_price) / pos.entry
 
-    def compute_raw_profit(self, pos: Dict[str, Any], live_price: float) -> Optional[float]:
-        try:
-            entry = float(pos.get('info', {}).get('entry_price') or pos.get('entryPrice'))
-            size  = float(pos.get('size') or pos.get('contracts') or 0)
-        except Exception:
-            return None
-        if size > 0:
-            return (live_price - entry) * size
+    def compute_raw_profit(self, pos: Pos, live_price: float) -> float:
+        if pos.size > 0:
+            return (live_price - pos.entry) * pos.size
         else:
-            return (entry - live_price) * abs(size)
+            return (pos.entry - live_price) * abs(pos.size)
 
     def update_trailing_stop(
         self,
-        pos: Dict[str, Any],
+        pos: Pos,
         live_price: float
     ) -> Tuple[Optional[float], Optional[float], Optional[str]]:
         """
@@ -103,15 +110,7 @@ class ProfitTrailing:
           - otherwise fixed_stop rule
         Return (trailing_stop, profit_pct, rule).
         """
-        pos_symbol = pos.get('info', {}).get('product_symbol') or pos.get('symbol', 'unknown')
-        # use the same floats for both storage and lookup
-        try:
-            entry = float(pos.get('info', {}).get('entry_price') or pos.get('entryPrice'))
-            size  = float(pos.get('size') or pos.get('contracts') or 0)
-        except Exception:
-            return None, None, None
-
-        key = f"{pos_symbol}_{entry}_{size}"
+        entry, size, key = pos.entry, pos.size, pos.key
 
         # update max profit (absolute)
         current_profit = (live_price - entry) if size > 0 else (entry - live_price)
@@ -136,22 +135,23 @@ class ProfitTrailing:
         pct = (new_max / entry) if entry else None
         return new_trailing, pct, rule
 
-    def book_profit(self, pos: Dict[str, Any], live_price: float) -> bool:
+    def book_profit(
+        self,
+        pos: Pos,
+        live_price: float,
+        trailing_stop: Optional[float] = None,
+        rule: Optional[str] = None
+    ) -> bool:
         """
-        If price crosses the trailing stop, close the position.
+        If price crosses the trailing stop, close the position. Callers that
+        already ran update_trailing_stop this tick pass its result in.
         """
-        pos_symbol = pos.get('info', {}).get('product_symbol') or pos.get('symbol', 'unknown')
-        try:
-            entry = float(pos.get('info', {}).get('entry_price') or pos.get('entryPrice'))
-            size  = float(pos.get('size') or pos.get('contracts') or 0)
-        except Exception:
-            return False
-
-        key = f"{pos_symbol}_{entry}_{size}"
+        size, key = pos.size, pos.key
 
-        trailing_stop, _, rule = self.update_trailing_stop(pos, live_price)
         if trailing_stop is None:
-            return False
+            trailing_stop, _, rule = self.update_trailing_stop(pos, live_price)
+            if trailing_stop is None:
+                return False
 
         should_close = (live_price < trailing_stop) if size > 0 else (live_price > trailing_stop)
         if should_close:
@@ -211,59 +211,38 @@ class ProfitTrailing:
                 continue
 
             for pos in self.cached_positions:
-                try:
-                    entry = float(pos.get('info', {}).get('entry_price') or pos.get('entryPrice'))
-                    size  = float(pos.get('size') or pos.get('contracts') or 0)
-                except Exception:
-                    continue
-                if size == 0:
-                    continue
-
-                pct = self.compute_profit_pct(pos, live_price) or 0.0
-                raw = self.compute_raw_profit(pos, live_price) or 0.0
-                profit_usd = raw / 1000.0
+                entry, size, key = pos.entry, pos.size, pos.key
 
                 trailing_stop, _, rule = self.update_trailing_stop(pos, live_price)
-                key = f"{pos.get('info', {}).get('product_symbol')}_{entry}_{size}"
-                max_pf = self.position_max_profit.get(key, 0.0)
                 target = self.target_long if size > 0 else self.target_short
-                target_str = f"{target:.2f}" if target is not None else "N/A"
-
-                display = {
-                    "entry": round(entry, 2),
-                    "live": round(live_price, 2),
-                    "profit_pct": round(pct * 100, 2),
-                    "profit_usd": round(profit_usd, 2),
-                    "max_profit": round(max_pf, 2),
-                    "rule": rule,
-                    "sl": round(trailing_stop or 0.0, 2),
-                    "target": target_str,
-                    "side": "long" if size > 0 else "short",
-                    "size": size
-                }
 
-                if self.last_display.get(key) != display:
-                    logger.info(
-                        "Order: %s | Size: %.0f (%s) | Entry: %.2f | Live: %.2f | PnL: %.2f%% | USD: %.2f | "
-                        "Max: %.2f | Rule: %s | SL: %.2f | Target: %s",
-                        key,
-                        size,
-                        display["side"],
-                        display["entry"],
-                        display["live"],
-                        display["profit_pct"],
-                        display["profit_usd"],
-                        display["max_profit"],
-                        display["rule"],
-                        display["sl"],
-                        display["target"]
-                    )
-                    self.last_display[key] = display
+                if logger.isEnabledFor(logging.INFO):
+                    # entry is fixed per key, so these cover every value in the log row
+                    display = (round(live_price, 2), round(trailing_stop or 0.0, 2), rule, target)
+                    if self.last_display.get(key) != display:
+                        self.last_display[key] = display
+                        logger.info(
+                            "Order: %s | Size: %.0f (%s) | Entry: %.2f | Live: %.2f | PnL: %.2f%% | USD: %.2f | "
+                            "Max: %.2f | Rule: %s | SL: %.2f | Target: %s",
+                            key,
+                            size,
+                            "long" if size > 0 else "short",
+                            entry,
+                            live_price,
+                            self.compute_profit_pct(pos, live_price) * 100,
+                            self.compute_raw_profit(pos, live_price) / 1000.0,
+                            self.position_max_profit.get(key, 0.0),
+                            rule,
+                            trailing_stop or 0.0,
+                            f"{target:.2f}" if target is not None else "N/A"
+                        )
 
                 try:
-                    if self.book_profit(pos, live_price):
+                    if self.book_profit(pos, live_price, trailing_stop, rule):
                         logger.info("Profit booked for order %s.", key)
                 except Exception as e:
                     logger.error("Error booking profit for %s: %s", key, e)
 
-            time.sleep(self.check_interval)
+            # next pass on the next price change, or after check_interval if the
+            # feed goes quiet so position refreshes keep going
+            self.ws.wait_for_price(self.check_interval)
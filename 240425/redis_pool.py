@@ -0,0 +1,17 @@
+# redis_pool.py
+
+import redis
+import config
+
+MAX_CONNECTIONS = 32
+
+# One connection pool shared by every Redis client in the process.
+# Replies stay bytes: JSON payloads are parsed from them directly.
+POOL = redis.ConnectionPool(host=config.REDIS_HOST, port=config.REDIS_PORT, db=config.REDIS_DB,
+                            max_connections=MAX_CONNECTIONS, decode_responses=False)
+
+def client() -> redis.Redis:
+    """
+    Redis client backed by the shared pool.
+    """
+    return redis.Redis(connection_pool=POOL)
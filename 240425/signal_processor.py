@@ -1,16 +1,41 @@
 # signal_processor.py
 
+import re
 import time
-import json
+import orjson
 import redis
 import logging
-from typing import Optional, Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Callable, Dict, List, Tuple
 from order_manager import OrderManager
 from trade_manager import TradeManager
 import config
+import redis_pool
 
 logger = logging.getLogger(__name__)
 
+# Side / take-profit keywords, matched at a word start in one pass ("tp1" still counts as tp)
+_SIDE_RE = re.compile(r"\b(buy|long|sell|short|tp|take profit)")
+
+def _wait_until(predicate: Callable[[], bool], timeout: float = 2.0, initial: float = 0.02) -> bool:
+    """
+    Poll predicate with exponential backoff until it returns True or timeout
+    seconds have passed. Returns whether the predicate was satisfied.
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.2)
+        try:
+            if predicate():
+                return True
+        except Exception as e:
+            logger.debug("Wait predicate raised: %s", e)
+
 class SignalProcessor:
     """
     Processes trading signals from Redis and executes order actions.
@@ -21,57 +46,111 @@ class SignalProcessor:
         self.profit_trailing = profit_trailing
         self.order_manager = OrderManager()
         self.trade_manager = TradeManager()
-        self.redis_client = redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            db=config.REDIS_DB
-        )
+        self.redis_client = redis_pool.client()
         self.last_signal: Optional[Dict[str, Any]] = None
+        # (text, supply min, demand max) of _last_fp_src, set by _handle_signal
+        self._last_fp: Optional[Tuple[str, Any, Any]] = None
+        self._last_fp_src: Optional[Dict[str, Any]] = None
+        # (supply min, demand max) last handed to profit_trailing.set_zone_limits
+        self._zone_fp: Optional[Tuple[Any, Any]] = None
+        self._use_blmpop: bool = True  # cleared if the server predates BLMPOP (Redis < 7)
 
     def fetch_signal(self, key: str = "BTCUSDT_signal") -> Optional[Dict[str, Any]]:
         try:
             raw = self.redis_client.lrange(key, -1, -1)
             if not raw:
                 return None
-            data = raw[0].decode() if isinstance(raw[0], bytes) else raw[0]
-            return json.loads(data)
+            # the pool returns bytes, which orjson parses without a str copy
+            return orjson.loads(raw[0])
         except Exception as e:
             logger.error("Error fetching signal from Redis (%s): %s", key, e)
             return None
 
-    def cancel_conflicting_orders(self, symbol: str, new_side: str) -> None:
+    def _cancel_orders(self, symbol: str, to_cancel: List[Dict[str, Any]], kind: str) -> None:
+        """
+        Cancel the given orders with one batch request; if the exchange rejects
+        the batch, cancel them concurrently and log each outcome separately.
+        """
+        if not to_cancel:
+            return
+        order_ids = [order["id"] for order in to_cancel]
         try:
-            for order in self.order_manager.client.exchange.fetch_open_orders(symbol):
-                if order.get("status", "").lower() != "open":
-                    continue
-                side = order.get("side", "").lower()
-                if side == new_side:
-                    continue
-                self.order_manager.client.cancel_order(order["id"], symbol)
-                logger.info("Canceled conflicting order: %s", order["id"])
+            self.order_manager.client.cancel_orders_batch(order_ids, symbol)
+            logger.info("Canceled %s orders: %s", kind, order_ids)
+            return
         except Exception as e:
-            logger.error("Error cancelling conflicting orders: %s", e)
+            logger.warning("Batch cancel failed (%s); canceling one by one.", e)
+        with ThreadPoolExecutor(max_workers=min(8, len(to_cancel))) as ex:
+            futures = [
+                (order["id"], ex.submit(self.order_manager.client.cancel_order, order["id"], symbol))
+                for order in to_cancel
+            ]
+            for order_id, fut in futures:
+                try:
+                    fut.result()
+                    logger.info("Canceled %s order: %s", kind, order_id)
+                except Exception as e:
+                    logger.error("Error cancelling %s order %s: %s", kind, order_id, e)
 
-    def cancel_same_side_orders(self, symbol: str, side: str) -> None:
+    def cancel_conflicting_orders(self, symbol: str, new_side: str,
+                                  orders: Optional[List[Dict[str, Any]]] = None) -> None:
         try:
-            for order in self.order_manager.client.exchange.fetch_open_orders(symbol):
-                if order.get("side", "").lower() == side and order.get("status", "").lower() == "open":
-                    self.order_manager.client.cancel_order(order["id"], symbol)
-                    logger.info("Canceled same-side order: %s", order["id"])
+            if orders is None:
+                orders = self.order_manager.client.exchange.fetch_open_orders(symbol)
+            to_cancel = [
+                o for o in orders
+                if o.get("status", "").lower() == "open" and o.get("side", "").lower() != new_side
+            ]
+            self._cancel_orders(symbol, to_cancel, "conflicting")
         except Exception as e:
-            logger.error("Error cancelling same-side orders: %s", e)
+            logger.error("Error cancelling conflicting orders: %s", e)
 
-    def open_pending_order_exists(self, symbol: str, side: str) -> bool:
+    def cancel_same_side_orders(self, symbol: str, side: str,
+                                orders: Optional[List[Dict[str, Any]]] = None) -> None:
         try:
-            return any(
-                o.get("side", "").lower() == side and o.get("status", "").lower() == "open"
-                for o in self.order_manager.client.exchange.fetch_open_orders(symbol)
-            )
+            if orders is None:
+                orders = self.order_manager.client.exchange.fetch_open_orders(symbol)
+            to_cancel = [
+                o for o in orders
+                if o.get("side", "").lower() == side and o.get("status", "").lower() == "open"
+            ]
+            self._cancel_orders(symbol, to_cancel, "same-side")
         except Exception as e:
-            logger.error("Error checking pending orders: %s", e)
-            return False
+            logger.error("Error cancelling same-side orders: %s", e)
+
+    def _position_closed(self, symbol: str, sign: int) -> bool:
+        """
+        True once no position on symbol has the given sign (1 long, -1 short).
+        """
+        for pos in self.order_manager.client.fetch_positions():
+            sym = pos.get("info", {}).get("product_symbol") or pos.get("symbol", "")
+            if not sym.startswith(symbol):
+                continue
+            size = float(pos.get("size") or pos.get("contracts") or 0)
+            if size * sign > 0:
+                return False
+        return True
+
+    def _orders_cleared(self, symbol: str) -> bool:
+        return not any(
+            o.get("status", "").lower() == "open"
+            for o in self.order_manager.client.exchange.fetch_open_orders(symbol)
+        )
+
+    @staticmethod
+    def _fingerprint(signal: Dict[str, Any]) -> Tuple[str, Any, Any]:
+        return (
+            signal.get("last_signal", {}).get("text", "").strip().lower(),
+            signal.get("supply_zone", {}).get("min", ""),
+            signal.get("demand_zone", {}).get("max", ""),
+        )
 
     def signals_are_different(self, new_signal: Dict[str, Any], old_signal: Optional[Dict[str, Any]]) -> bool:
+        # only trust the cached tuple if it was taken from this very signal
+        # (main.py may assign last_signal directly)
+        if config.SIGNAL_FINGERPRINT and old_signal is not None and old_signal is self._last_fp_src:
+            return self._fingerprint(new_signal) != self._last_fp
+
         new_text   = new_signal.get("last_signal", {}).get("text", "").strip().lower()
         new_supply = new_signal.get("supply_zone", {}).get("min", "")
         new_demand = new_signal.get("demand_zone", {}).get("max", "")
@@ -88,11 +167,13 @@ class SignalProcessor:
         last = signal_data.get("last_signal", {})
         text = last.get("text", "").lower()
         valid = signal_data.get("valid_position", False)
+        matches = set(_SIDE_RE.findall(text))
+        is_tp = "take profit" in matches or "tp" in matches
 
         # determine new side
-        if "buy" in text or "long" in text:
+        if "buy" in matches or "long" in matches:
             new_side = "buy"
-        elif "sell" in text or "short" in text:
+        elif "sell" in matches or "short" in matches:
             new_side = "sell"
         else:
             logger.warning("Unknown signal text '%s' — skipping.", text)
@@ -105,7 +186,11 @@ class SignalProcessor:
         demand = signal_data.get("demand_zone", {})
         raw_supply = supply.get("min")
         raw_demand = demand.get("max")
-        if self.profit_trailing:
+        zone_fp = (raw_supply, raw_demand)
+        if is_tp and zone_fp == self._zone_fp:
+            # TP signals are not traded; only refresh targets when zones move
+            logger.debug("TP signal with unchanged zones — keeping targets.")
+        elif self.profit_trailing:
             try:
                 self.profit_trailing.set_zone_limits(
                     supply_max=float(raw_supply) if raw_supply else None,
@@ -117,11 +202,12 @@ class SignalProcessor:
                     self.profit_trailing.target_long,
                     self.profit_trailing.target_short
                 )
+                self._zone_fp = zone_fp
             except Exception as e:
                 logger.warning("Failed to set zone limits: %s", e)
 
         # skip TP signals
-        if "take profit" in text or "tp" in text:
+        if is_tp:
             logger.info("Take profit signal — skipping order placement.")
             if self.profit_trailing:
                 self.profit_trailing.take_profit_detected = True
@@ -141,9 +227,16 @@ class SignalProcessor:
             logger.info("Using live price: %.2f", price)
         price = float(price)
 
+        # one positions fetch serves both the opposite-close and the same-side check
+        try:
+            positions = self.order_manager.client.fetch_positions()
+        except Exception as e:
+            logger.error("Error fetching positions: %s", e)
+            positions = None
+
         # always close opposite
         try:
-            for pos in self.order_manager.client.fetch_positions():
+            for pos in positions or ():
                 # filter to our symbol
                 sym = pos.get("info", {}).get("product_symbol") or pos.get("symbol", "")
                 if not sym.startswith(config.SYMBOL):
@@ -155,14 +248,14 @@ class SignalProcessor:
                         config.SYMBOL, "buy", abs(size),
                         params={"time_in_force": "ioc"}, force=True
                     )
-                    time.sleep(2)
+                    _wait_until(lambda: self._position_closed(config.SYMBOL, -1))
                 elif new_side == "sell" and size > 0:
                     logger.info("Closing long of size %.2f before sell.", size)
                     self.trade_manager.place_market_order(
                         config.SYMBOL, "sell", size,
                         params={"time_in_force": "ioc"}, force=True
                     )
-                    time.sleep(2)
+                    _wait_until(lambda: self._position_closed(config.SYMBOL, 1))
         except Exception as e:
             logger.error("Error closing opposite positions: %s", e)
 
@@ -171,13 +264,20 @@ class SignalProcessor:
             logger.info("valid_position=false — skipping new order placement.")
             return None
 
-        # cancel any open limit/bracket orders
-        self.cancel_conflicting_orders(config.SYMBOL, new_side)
-        self.cancel_same_side_orders(config.SYMBOL, new_side)
-        time.sleep(2)
+        # cancel any open limit/bracket orders, from a single open-orders fetch
+        try:
+            orders = self.order_manager.client.exchange.fetch_open_orders(config.SYMBOL)
+        except Exception as e:
+            logger.error("Error fetching open orders: %s", e)
+            orders = []
+        self.cancel_conflicting_orders(config.SYMBOL, new_side, orders=orders)
+        self.cancel_same_side_orders(config.SYMBOL, new_side, orders=orders)
+        if orders:
+            _wait_until(lambda: self._orders_cleared(config.SYMBOL))
 
         # skip if already in position
-        if self.order_manager.has_open_position(config.SYMBOL, new_side):
+        # closing the opposite side cannot open new_side, so the earlier list still holds
+        if self.order_manager.has_open_position(config.SYMBOL, new_side, positions=positions):
             logger.info("Already in %s position — skipping new order.", new_side)
             return None
 
@@ -220,12 +320,95 @@ class SignalProcessor:
             logger.error("Failed to attach bracket: %s", e)
             return None
 
-    def process_signals_loop(self, sleep_interval: int = 5) -> None:
+    def _handle_signal(self, sig: Optional[Dict[str, Any]]) -> None:
+        if sig and self.signals_are_different(sig, self.last_signal):
+            logger.info("New signal: %s", sig["last_signal"]["text"])
+            _ = self.process_signal(sig)
+            self.last_signal = sig
+            self._last_fp = self._fingerprint(sig)
+            self._last_fp_src = sig
+
+    def _discard_backlog(self, queue_key: str) -> None:
+        """
+        Drop signals queued while no consumer was running. The queue is
+        cleared before the history list is read, so a signal pushed in between
+        is seen in both and handled once.
+        """
+        try:
+            dropped = self.redis_client.delete(queue_key)
+            if dropped:
+                logger.info("Discarded stale signal backlog in %s", queue_key)
+        except Exception as e:
+            logger.error("Error clearing signal queue %s: %s", queue_key, e)
+
+    def _pop_signals(self, queue_key: str, count: int = 1000) -> List[bytes]:
+        """
+        Block until the queue is non-empty, then pop up to count entries in
+        one round trip (oldest first). count exceeds the producer's queue cap,
+        so one pop empties the queue and items[-1] is the newest signal.
+        Falls back to BLPOP on Redis < 7.
+        """
+        if self._use_blmpop:
+            try:
+                _, items = self.redis_client.execute_command(
+                    "BLMPOP", 0, 1, queue_key, "LEFT", "COUNT", count
+                )
+                return items
+            except redis.exceptions.ResponseError as e:
+                logger.info("BLMPOP unavailable (%s); falling back to BLPOP.", e)
+                self._use_blmpop = False
+        _, raw = self.redis_client.blpop([queue_key], timeout=0)
+        return [raw]
+
+    def process_signals_loop(self, sleep_interval: int = 5, key: str = "BTCUSDT_signal") -> None:
+        """
+        Block on the "<key>_queue" list with BLPOP so each signal is handled as
+        soon as the producer pushes it. On startup the backlog left in the
+        queue is discarded and the newest entry of the <key> history list is
+        used instead; sleep_interval is only the back-off after a Redis error.
+        """
         logger.info("Starting signal processing loop...")
+        queue_key = f"{key}_queue"
+        self._discard_backlog(queue_key)
+        self._handle_signal(self.fetch_signal(key))
+        while True:
+            try:
+                items = self._pop_signals(queue_key)
+                if len(items) > 1:
+                    logger.info("Drained %d queued signals; acting on the newest.", len(items))
+                # older entries were superseded while the last one was being processed
+                sig = orjson.loads(items[-1])
+            except Exception as e:
+                logger.error("Error reading signal queue %s: %s", queue_key, e)
+                time.sleep(sleep_interval)
+                continue
+            self._handle_signal(sig)
+
+    def process_signals_pubsub(self, sleep_interval: int = 5, key: str = "BTCUSDT_signal") -> None:
+        """
+        Fan-out alternative to process_signals_loop: subscribe to "<key>_chan"
+        and read the newest entry of <key> only when a notification arrives, so
+        several consumers can follow the same producer. The list is also read
+        when nothing is published within sleep_interval, to recover a missed
+        notification.
+        """
+        logger.info("Starting signal subscription loop...")
+        channel = f"{key}_chan"
+        self._handle_signal(self.fetch_signal(key))
         while True:
-            sig = self.fetch_signal()
-            if sig and self.signals_are_different(sig, self.last_signal):
-                logger.info("New signal: %s", sig["last_signal"]["text"])
-                _ = self.process_signal(sig)
-                self.last_signal = sig
-            time.sleep(sleep_interval)
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(channel)
+                while True:
+                    message = pubsub.get_message(timeout=sleep_interval)
+                    if message and message.get("type") == "message":
+                        logger.debug("Signal notification %s on %s", message.get("data"), channel)
+                    self._handle_signal(self.fetch_signal(key))
+            except Exception as e:
+                logger.error("Signal subscription error on %s: %s", channel, e)
+                time.sleep(sleep_interval)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
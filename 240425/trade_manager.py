@@ -1,11 +1,11 @@
 import time
 import logging
 import uuid
-import redis
 from typing import Any, Dict, Optional
 from exchange import DeltaExchangeClient
 from order_manager import OrderManager
 import config
+import redis_pool
 
 logger = logging.getLogger(__name__)
 TOLERANCE = 1e-6  # Tolerance for treating near-zero sizes as zero
@@ -20,11 +20,7 @@ class TradeManager:
         self.order_manager: OrderManager = OrderManager()
         self.highest_price: Optional[float] = None
         # Redis (if needed for signals)
-        self.redis_client = redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            db=config.REDIS_DB
-        )
+        self.redis_client = redis_pool.client()
 
     def get_current_price(self, product_symbol: str) -> float:
         try:
@@ -106,7 +102,7 @@ class TradeManager:
                 logger.error("Error fetching open orders: %s", e)
 
             # stale local orders cleanup
-            current_time = int(time.time() * 1000)
+            current_time = time.time_ns() // 1_000_000
             stale_ids = [oid for oid, o in self.order_manager.orders.items() if current_time - o.get("timestamp", 0) > 60000]
             for oid in stale_ids:
                 del self.order_manager.orders[oid]
@@ -132,9 +128,9 @@ class TradeManager:
                 "amount": amount,
                 "params": params or {},
                 "status": order.get("status", "open"),
-                "timestamp": order.get("timestamp", int(time.time() * 1000))
+                "timestamp": order.get("timestamp", time.time_ns() // 1_000_000)
             }
-            self.order_manager.orders[order_id] = order_info
+            self.order_manager._cache_order(order_id, order_info)
             self.order_manager._store_order(order_info)
             time.sleep(1)
 
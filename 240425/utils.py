@@ -1,4 +1,6 @@
 import datetime
+import json
+import orjson
 
 def timestamp_to_str(timestamp, fmt="%Y-%m-%d %H:%M:%S"):
     if timestamp > 1e12:
@@ -15,6 +17,17 @@ def round_decimal(value, precision=2):
     except Exception:
         return value
 
+def dumps(obj) -> bytes:
+    """
+    Serialize obj to JSON bytes with orjson, falling back to json.dumps for
+    values orjson rejects (e.g. Decimal or int subclasses) so a record is not
+    dropped over its encoding.
+    """
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return json.dumps(obj, default=str).encode()
+
 if __name__ == "__main__":
     test_timestamp_micro = 1742402453659000
     print("Microseconds timestamp:", test_timestamp_micro, "->", timestamp_to_str(test_timestamp_micro))
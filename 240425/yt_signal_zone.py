@@ -16,6 +16,7 @@ warnings.filterwarnings("ignore", message="RNN module weights are not part of si
 r = redis.Redis(host='localhost', port=6379, db=0)
 BTC_URL = "https://www.youtube.com/live/jkP1Sw7M2iU"
 reader = easyocr.Reader(['en'])
+SIGNAL_QUEUE_MAX = 100  # unconsumed entries kept in <symbol>_signal_queue
 
 SUPPLY_HSV = ((54, 78, 38), (66, 174, 82))
 DEMAND_HSV = ((2, 135, 47), (12, 252, 130))
@@ -201,7 +202,16 @@ def stream_worker(url, symbol):
                 # Only push on change
                 if aggregated["last_signal"]["text"] != last_text:
                     try:
-                        r.rpush(f"{symbol}_signal", json.dumps(aggregated))
+                        payload = json.dumps(aggregated)
+                        # history list for warm starts, plus the FIFO queue the consumer BLPOPs;
+                        # one round trip, and the publish runs after both lists are written
+                        pipe = r.pipeline(transaction=False)
+                        pipe.rpush(f"{symbol}_signal", payload)
+                        pipe.rpush(f"{symbol}_signal_queue", payload)
+                        pipe.ltrim(f"{symbol}_signal_queue", -SIGNAL_QUEUE_MAX, -1)
+                        # wake pub/sub consumers; they read the payload from the history list
+                        pipe.publish(f"{symbol}_signal_chan", aggregated["last_signal"]["text"])
+                        pipe.execute()
                         print(f"[{symbol}] →", aggregated)
                     except Exception as e:
                         print(f"Redis write error for {symbol}:", e)
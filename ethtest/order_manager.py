@@ -1,8 +1,10 @@
+import heapq
+import itertools
 import logging
 import time
 import json
 import redis
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from exchange import DeltaExchangeClient
 import config
 
@@ -18,8 +20,32 @@ class OrderManager:
         """
         self.client: DeltaExchangeClient = DeltaExchangeClient()
         self.orders: Dict[Any, Dict[str, Any]] = {}  # Local cache for orders.
+        # (timestamp, seq, order id) min-heap over self.orders for stale-order eviction.
+        self._order_heap: List[Tuple[int, int, Any]] = []
+        self._order_seq = itertools.count()
         self.redis_client = redis.Redis(host=config.REDIS_HOST, port=config.REDIS_PORT, db=config.REDIS_DB)
 
+    def _track_order(self, order_info: Dict[str, Any]) -> None:
+        """
+        Add or replace an order in the local cache and index it by timestamp.
+        """
+        ts = order_info.get("timestamp") or 0
+        self.orders[order_info["id"]] = order_info
+        heapq.heappush(self._order_heap, (ts, next(self._order_seq), order_info["id"]))
+
+    def evict_stale(self, max_age_ms: int = 60000) -> None:
+        """
+        Drop cached orders older than max_age_ms, popping only the stale head of the heap.
+        """
+        cutoff = int(time.time() * 1000) - max_age_ms
+        heap = self._order_heap
+        while heap and heap[0][0] < cutoff:
+            ts, _, oid = heapq.heappop(heap)
+            order = self.orders.get(oid)
+            # Skip entries superseded by a later _track_order for the same id.
+            if order is not None and (order.get("timestamp") or 0) == ts:
+                del self.orders[oid]
+
     def _store_order(self, order_info: Dict[str, Any]) -> None:
         """
         Store or update the order info in Redis using its order ID.
@@ -114,7 +140,7 @@ class OrderManager:
                 'status': order.get('status', 'open'),
                 'timestamp': order.get('timestamp', int(time.time() * 1000))
             }
-            self.orders[order_id] = order_info
+            self._track_order(order_info)
             self._store_order(order_info)
             logger.debug("Placed order: %s", order_info)
             return order_info
@@ -152,7 +178,7 @@ class OrderManager:
                     'status': exchange_order.get('state', 'open'),
                     'timestamp': exchange_order.get('created_at', int(time.time() * 1000000))
                 }
-                self.orders[order_id] = updated_order
+                self._track_order(updated_order)
 
             self._store_order(updated_order)
             logger.debug("Bracket attached to order %s: %s", order_id, updated_order)
@@ -16,7 +16,7 @@ class ProfitTrailing:
     def __init__(self, ws_instance, check_interval: int = 1) -> None:
         self.ws = ws_instance  # Shared BinanceWebsocket instance.
         self.client = DeltaExchangeClient()
-        self.trade_manager = TradeManager()
+        self.trade_manager = TradeManager(ws=ws_instance)
         self.check_interval: int = check_interval
         self.position_trailing_stop: Dict[Any, float] = {}   # key -> trailing stop price
         self.last_had_positions: bool = True
@@ -254,13 +254,19 @@ class ProfitTrailing:
                     if self.book_profit(pos, live_price):
                         logger.info("Profit booked for order %s.", key)
 
-            time.sleep(self.check_interval)
+            # next pass on the next price change, or after check_interval if the
+            # feed goes quiet so position refreshes keep going
+            self.ws.wait_for_price(self.check_interval)
 
 if __name__ == '__main__':
     # For testing, create a dummy websocket object with a current_price attribute.
     class DummyWS:
         current_price = 3100.0
 
+        def wait_for_price(self, timeout=None):
+            time.sleep(timeout)
+            return False
+
     dummy_ws = DummyWS()
     pt = ProfitTrailing(dummy_ws, check_interval=1)
     pt.track()
@@ -20,7 +20,7 @@ class SignalProcessor:
         self.ws = ws_instance
         self.profit_trailing = profit_trailing
         self.order_manager = OrderManager()
-        self.trade_manager = TradeManager()
+        self.trade_manager = TradeManager(ws=ws_instance)
         self.redis_client = redis.Redis(
             host=config.REDIS_HOST,
             port=config.REDIS_PORT,
@@ -1,27 +1,115 @@
 import time
 import logging
+import threading
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 import redis
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from exchange import DeltaExchangeClient
 from order_manager import OrderManager
 import config
 
 logger = logging.getLogger(__name__)
 TOLERANCE = 1e-6  # Tolerance for treating near-zero sizes as zero
+WS_PRICE_MAX_AGE = 5.0  # seconds before a websocket price is considered stale
+TICKER_TTL = 0.3  # seconds a REST ticker price is reused
+TICKER_ACTIVE_WINDOW = 60.0  # seconds a symbol stays in the batched refresh after its last request
+
+# Process-wide ticker cache shared by every TradeManager: symbol -> (monotonic ts, last price)
+_TICKER_CACHE: Dict[str, Tuple[float, float]] = {}
+# symbol -> monotonic time get_current_price() last asked for it
+_TICKER_REQUESTED: Dict[str, float] = {}
+_TICKER_LOCK = threading.Lock()
+
+# Runs the open-orders pre-check fetch while the calling thread fetches positions.
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tm-prefetch")
+
+
+def _position_size(pos: Dict[str, Any]) -> float:
+    try:
+        return float(pos.get("size") or pos.get("contracts") or 0)
+    except Exception:
+        return 0.0
+
+
+def _normalize_positions(raw: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    """
+    Reduce ccxt position dicts to (product symbol, signed size) pairs once per fetch.
+    """
+    return [
+        ((pos.get("info") or {}).get("product_symbol") or pos.get("symbol") or "", _position_size(pos))
+        for pos in raw
+    ]
 
 class TradeManager:
     """
     Manages trade execution by placing market orders and monitoring trailing stops.
     """
-    def __init__(self) -> None:
+    def __init__(self, ws: Optional[Any] = None) -> None:
         self.client: DeltaExchangeClient = DeltaExchangeClient()
         self.order_manager: OrderManager = OrderManager()
         self.highest_price: Optional[float] = None
+        self.ws = ws  # Optional shared BinanceWebsocket instance.
+        # Short-lived REST caches. Each entry holds the Future of its latest
+        # fetch, so concurrent callers on a miss all wait on one upstream call.
+        self._pos_cache: Dict[str, Any] = {"ts": 0.0, "fut": None}
+        self._orders_cache: Dict[str, Dict[str, Any]] = {}  # symbol -> {"ts", "fut"}
+        self._cache_lock = threading.Lock()
+
+    def _coalesced_fetch(self, cache: Dict[str, Any], fetch: Callable[[], Any], max_age: float) -> Any:
+        """
+        Return the cached result if it is younger than max_age seconds, join a
+        fetch already in flight, or else run fetch() as the single owner.
+        """
+        with self._cache_lock:
+            fut = cache["fut"]
+            if fut is not None and (not fut.done() or time.monotonic() - cache["ts"] < max_age):
+                owner = False
+            else:
+                fut = cache["fut"] = Future()
+                owner = True
+        if not owner:
+            return fut.result()
+        try:
+            data = fetch()
+        except Exception as e:
+            with self._cache_lock:
+                if cache["fut"] is fut:
+                    cache["fut"] = None  # let the next caller retry
+            fut.set_exception(e)
+            raise
+        cache["ts"] = time.monotonic()
+        fut.set_result(data)
+        return data
+
+    def _get_positions_cached(self, max_age: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        Return fetch_positions(), reusing a result younger than max_age seconds.
+        """
+        return self._coalesced_fetch(self._pos_cache, self.client.fetch_positions, max_age)
+
+    def _get_open_orders_cached(self, symbol: str, max_age: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        Return fetch_open_orders(symbol), reusing a result younger than max_age seconds.
+        """
+        with self._cache_lock:
+            cache = self._orders_cache.setdefault(symbol, {"ts": 0.0, "fut": None})
+        return self._coalesced_fetch(
+            cache, lambda: self.client.exchange.fetch_open_orders(symbol), max_age
+        )
+
+    def _invalidate_caches(self) -> None:
+        with self._cache_lock:
+            self._pos_cache["fut"] = None
+            for cache in self._orders_cache.values():
+                cache["fut"] = None
 
     def get_current_price(self, product_symbol: str) -> float:
         """
         Retrieve the current price for the given product using the exchange ticker.
+        Prices are shared across instances for TICKER_TTL seconds; when several
+        symbols were requested within TICKER_ACTIVE_WINDOW, one fetch_tickers()
+        call refreshes all of them. Symbols idle for longer are evicted.
         
         Args:
             product_symbol (str): The trading symbol (e.g., "ETHUSD").
@@ -32,15 +120,56 @@ class TradeManager:
         Raises:
             Exception: If fetching the ticker fails.
         """
+        now = time.monotonic()
+        _TICKER_REQUESTED[product_symbol] = now
+        cached = _TICKER_CACHE.get(product_symbol)
+        if cached and now - cached[0] < TICKER_TTL:
+            return cached[1]
         try:
-            ticker = self.client.exchange.fetch_ticker(product_symbol)
-            price = float(ticker.get("last"))
-            return price
+            with _TICKER_LOCK:
+                # another thread may have refreshed it while we waited
+                cached = _TICKER_CACHE.get(product_symbol)
+                if cached and time.monotonic() - cached[0] < TICKER_TTL:
+                    return cached[1]
+                exchange = self.client.exchange
+                cutoff = time.monotonic() - TICKER_ACTIVE_WINDOW
+                for sym, requested in list(_TICKER_REQUESTED.items()):
+                    if requested < cutoff:
+                        _TICKER_REQUESTED.pop(sym, None)
+                        _TICKER_CACHE.pop(sym, None)
+                symbols = set(_TICKER_REQUESTED) | {product_symbol}
+                if len(symbols) > 1:
+                    # fetch_tickers keys results by unified symbol (e.g. "ETH/USD:USD");
+                    # map them back to the market ids the cache uses
+                    markets = exchange.markets or {}
+                    tickers = {
+                        (markets[sym]["id"] if sym in markets else sym): ticker
+                        for sym, ticker in exchange.fetch_tickers(list(symbols)).items()
+                    }
+                else:
+                    tickers = {product_symbol: exchange.fetch_ticker(product_symbol)}
+                ts = time.monotonic()
+                for sym, ticker in tickers.items():
+                    if sym in symbols and ticker.get("last") is not None:
+                        _TICKER_CACHE[sym] = (ts, float(ticker["last"]))
+                # KeyError if the exchange did not return our symbol; logged below
+                return float(tickers[product_symbol]["last"])
         except Exception as e:
             logger.error("Error fetching current price for %s: %s", product_symbol, e)
             raise
 
-    def monitor_trailing_stop(self, bracket_order_id: Any, product_symbol: str, trailing_stop_percent: float, update_interval: int = 10) -> None:
+    def get_live_price(self, product_symbol: str) -> float:
+        """
+        Return the latest websocket price, falling back to the REST ticker
+        when there is no websocket or its price is older than WS_PRICE_MAX_AGE.
+        """
+        if self.ws is not None:
+            price, last_update = self.ws.get_price()
+            if price is not None and time.time() - last_update < WS_PRICE_MAX_AGE:
+                return price
+        return self.get_current_price(product_symbol)
+
+    def monitor_trailing_stop(self, bracket_order_id: Any, product_symbol: str, trailing_stop_percent: float, update_interval: int = 1) -> None:
         """
         Continuously monitors the market price and updates the trailing stop based on the highest price reached.
         
@@ -52,7 +181,7 @@ class TradeManager:
         """
         logger.info("Starting trailing stop monitoring for %s", product_symbol)
         try:
-            self.highest_price = self.get_current_price(product_symbol)
+            self.highest_price = self.get_live_price(product_symbol)
             logger.info("Initial highest price: %s", self.highest_price)
         except Exception as e:
             logger.error("Could not fetch initial price: %s", e)
@@ -60,7 +189,7 @@ class TradeManager:
 
         while True:
             try:
-                current_price = self.get_current_price(product_symbol)
+                current_price = self.get_live_price(product_symbol)
             except Exception as e:
                 logger.error("Error fetching price: %s", e)
                 time.sleep(update_interval)
@@ -89,17 +218,14 @@ class TradeManager:
 
         # If not forced, run the safety checks
         if not force:
+            # Both pre-checks need a REST call; overlap them.
+            orders_fut = _PREFETCH_POOL.submit(self._get_open_orders_cached, symbol)
             # 1. Check for existing open positions.
             try:
-                positions = self.client.fetch_positions()
-                for pos in positions:
-                    pos_symbol = (pos.get("info", {}).get("product_symbol") or pos.get("symbol") or "")
+                positions = self._get_positions_cached()
+                for pos_symbol, size in _normalize_positions(positions):
                     if symbol not in pos_symbol:
                         continue
-                    try:
-                        size = float(pos.get("size") or pos.get("contracts") or 0)
-                    except Exception:
-                        size = 0.0
                     if side_lower == "buy" and size > 0:
                         logger.info("An open buy position exists for %s. Skipping market order.", symbol)
                         return None
@@ -111,7 +237,7 @@ class TradeManager:
 
             # 2. Check for existing pending orders via the exchange API.
             try:
-                open_orders = self.client.exchange.fetch_open_orders(symbol)
+                open_orders = orders_fut.result()
                 for order in open_orders:
                     if order.get("side", "").lower() == side_lower:
                         logger.info("A pending %s order exists for %s. Skipping market order.", side, symbol)
@@ -120,13 +246,7 @@ class TradeManager:
                 logger.error("Error fetching open orders: %s", e)
 
             # 3. Clean up stale orders from the local cache.
-            current_time = int(time.time() * 1000)
-            stale_order_ids = [
-                oid for oid, order in self.order_manager.orders.items()
-                if current_time - order.get("timestamp", 0) > 60000
-            ]
-            for oid in stale_order_ids:
-                del self.order_manager.orders[oid]
+            self.order_manager.evict_stale(60000)
 
             # 4. Check the local cache for pending orders.
             for order in self.order_manager.orders.values():
@@ -143,6 +263,8 @@ class TradeManager:
 
         try:
             order = self.client.exchange.create_order(symbol, "market", side, amount, None, params or {})
+            # the order changes both positions and open orders
+            self._invalidate_caches()
             order_id = order.get("id", str(uuid.uuid4()))
             order_info = {
                 "id": order_id,
@@ -153,20 +275,15 @@ class TradeManager:
                 "status": order.get("status", "open"),
                 "timestamp": order.get("timestamp", int(time.time() * 1000))
             }
-            self.order_manager.orders[order_id] = order_info
+            self.order_manager._track_order(order_info)
             self.order_manager._store_order(order_info)
             time.sleep(1)  # Brief delay to allow order processing.
 
             # Optionally, verify the order by fetching positions again.
-            positions_after = self.client.fetch_positions()
-            for pos in positions_after:
-                pos_symbol = (pos.get("info", {}).get("product_symbol") or pos.get("symbol") or "")
+            positions_after = _normalize_positions(self._get_positions_cached())
+            for pos_symbol, size in positions_after:
                 if symbol not in pos_symbol:
                     continue
-                try:
-                    size = float(pos.get("size") or pos.get("contracts") or 0)
-                except Exception:
-                    size = 0.0
                 if (side_lower == "buy" and size > 0) or (side_lower == "sell" and size < 0):
                     logger.info("Market order verified for %s.", symbol)
                     break
@@ -1,74 +1,138 @@
 # additional_factors.py
 
-def candle_range_percent(candle: dict) -> float:
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+def _num(v) -> Optional[float]:
     """
-    (high - low) / open * 100
+    float(v), or None if v is missing or not numeric.
     """
     try:
-        high = float(candle.get("high", 0))
-        low = float(candle.get("low", 0))
-        o = float(candle.get("open", 0))
-        return ((high - low) / o) * 100 if o else 0.0
-    except:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+@dataclass(slots=True)
+class ParsedCandle:
+    """
+    A websocket candle with its numeric fields converted once at ingest.
+    Missing fields read as 0.0 (the old .get(..., 0) default); fields present
+    but not numeric are None, which makes the factors using them return 0.0.
+    """
+    open: Optional[float]
+    high: Optional[float]
+    low: Optional[float]
+    close: Optional[float]
+    vwap: Optional[float]
+    volume: Optional[float]
+    buyVolume: Optional[float]
+    sellVolume: Optional[float]
+    bidVolume: Optional[float]
+    askVolume: Optional[float]
+    heatmap: list
+    heatmapDelta: list
+    heatmapBuys: list
+    heatmapSells: list
+
+    @classmethod
+    def from_dict(cls, candle: dict) -> "ParsedCandle":
+        g = candle.get
+        return cls(
+            open=_num(g("open", 0)),
+            high=_num(g("high", 0)),
+            low=_num(g("low", 0)),
+            close=_num(g("close", 0)),
+            vwap=_num(g("vwap", 0)),
+            volume=_num(g("volume", 0)),
+            buyVolume=_num(g("buyVolume", 0)),
+            sellVolume=_num(g("sellVolume", 0)),
+            bidVolume=_num(g("bidVolume", 0)),
+            askVolume=_num(g("askVolume", 0)),
+            heatmap=g("heatmapOrderBook") or g("heatmap") or [],
+            heatmapDelta=g("heatmapDelta") or [],
+            heatmapBuys=g("heatmapBuys") or [],
+            heatmapSells=g("heatmapSells") or [],
+        )
+
+def _pairs(flat) -> np.ndarray:
+    """
+    View a flat [price, vol, price, vol, ...] list as an (n, 2) float array.
+    A trailing unpaired value is dropped; if some entry is not numeric, the
+    pairs are converted one by one and the malformed ones skipped.
+    """
+    n = len(flat) // 2 * 2
+    try:
+        return np.asarray(flat[:n], dtype=np.float64).reshape(-1, 2)
+    except (TypeError, ValueError):
+        rows = []
+        for i in range(0, n, 2):
+            try:
+                rows.append((float(flat[i]), float(flat[i+1])))
+            except (TypeError, ValueError):
+                continue
+        return np.array(rows, dtype=np.float64).reshape(-1, 2)
+
+def candle_range_percent(candle: ParsedCandle) -> float:
+    """
+    (high - low) / open * 100
+    """
+    high, low, o = candle.high, candle.low, candle.open
+    if high is None or low is None or not o:
         return 0.0
+    return ((high - low) / o) * 100
 
-def bid_ask_percent(candle: dict) -> float:
+def bid_ask_percent(candle: ParsedCandle) -> float:
     """
     (bidVolume - askVolume) / (bidVolume + askVolume) * 100
     """
-    try:
-        b = float(candle.get("bidVolume", 0))
-        a = float(candle.get("askVolume", 0))
-        total = b + a
-        return ((b - a) / total) * 100 if total else 0.0
-    except:
+    b, a = candle.bidVolume, candle.askVolume
+    if b is None or a is None:
         return 0.0
+    total = b + a
+    return ((b - a) / total) * 100 if total else 0.0
 
-def heatmap_flow_percent(candle: dict) -> float:
+def heatmap_flow_percent(candle: ParsedCandle) -> float:
     """
     Net buy/sell % from heatmap around current price.
     """
-    heatmap = candle.get("heatmapOrderBook") or candle.get("heatmap") or []
-    try:
-        cp = float(candle.get("close", 0))
-    except:
+    cp = candle.close
+    if cp is None:
         return 0.0
-    buys = sells = 0.0
-    for i in range(0, len(heatmap), 2):
-        try:
-            price = float(heatmap[i])
-            vol   = float(heatmap[i+1])
-            if price < cp:
-                buys += vol
-            elif price > cp:
-                sells += vol
-        except:
-            continue
+    arr = _pairs(candle.heatmap)
+    prices, vols = arr[:, 0], arr[:, 1]
+    buys  = float(vols[prices < cp].sum())
+    sells = float(vols[prices > cp].sum())
     total = buys + sells
     return ((buys - sells) / total) * 100 if total else 0.0
 
-def heatmap_delta_average_percent(candle: dict) -> float:
+def heatmap_delta_average_percent(candle: ParsedCandle) -> float:
     """
     Avg heatmapDelta[*][1] / close * 100
     """
     try:
-        cp = float(candle.get("close", 0))
-        delta = candle.get("heatmapDelta") or []
-        vals = [float(delta[i+1]) for i in range(0, len(delta), 2)]
-        return (sum(vals)/len(vals) / cp) * 100 if vals and cp else 0.0
-    except:
+        cp = candle.close
+        delta = candle.heatmapDelta
+        if cp is None or len(delta) % 2:
+            return 0.0
+        vals = np.asarray(delta[1::2], dtype=np.float64)
+        return float(vals.mean() / cp) * 100 if vals.size and cp else 0.0
+    except (TypeError, ValueError):
         return 0.0
 
-def heatmap_buy_sell_ratio(candle: dict) -> float:
+def heatmap_buy_sell_ratio(candle: ParsedCandle) -> float:
     """
     (sum(heatmapBuys volumes) - sum(heatmapSells volumes)) / total * 100
     """
     try:
-        buys  = candle.get("heatmapBuys") or []
-        sells = candle.get("heatmapSells") or []
-        tb = sum(float(buys[i+1]) for i in range(0, len(buys), 2))
-        ts = sum(float(sells[i+1]) for i in range(0, len(sells), 2))
+        buys  = candle.heatmapBuys
+        sells = candle.heatmapSells
+        if len(buys) % 2 or len(sells) % 2:
+            return 0.0
+        tb = float(np.asarray(buys[1::2], dtype=np.float64).sum())
+        ts = float(np.asarray(sells[1::2], dtype=np.float64).sum())
         total = tb + ts
         return ((tb - ts) / total) * 100 if total else 0.0
-    except:
+    except (TypeError, ValueError):
         return 0.0
@@ -1,21 +1,74 @@
 # data_storage.py
 
-import redis
 import json
 import time
+import queue
+import logging
+import threading
+import redis_pool
+
+try:
+    import orjson
+    _ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def _dumps(obj):
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTS)
+        except TypeError:
+            # e.g. other float or int subclasses, which json.dumps accepts
+            return json.dumps(obj).encode()
+except ImportError:  # orjson is optional; fall back to stdlib json, encoded to bytes
+    def _dumps(obj):
+        return json.dumps(obj).encode()
 
 class DataStorage:
     """
     Simple Redis-based storage for live metrics.
+    Writes are queued and sent by a background thread in pipelined batches.
     """
 
-    def __init__(self, host='localhost', port=6379, db=0):
-        self.redis = redis.StrictRedis(host=host, port=port, db=db, decode_responses=True)
+    def __init__(self, host='localhost', port=6379, db=0, batch_size=512, flush_interval=0.05):
+        self.redis = redis_pool.client(host, port, db)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._q = queue.Queue()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
 
     def store(self, key: str, data: dict):
         """
-        Push a JSON-serialized dict with timestamp into a Redis list.
+        Queue a JSON-serialized dict with timestamp for LPUSH into a Redis list.
+        Returns immediately; the write happens on the flusher thread.
+        """
+        self.store_bytes(key, _dumps({**data, "timestamp": time.time()}))
+
+    def store_bytes(self, key: str, payload: bytes):
+        """
+        Queue an already-serialized entry (timestamp included) for LPUSH.
+        Hot callers that encode their own records skip the copy and dump in store().
+        """
+        self._q.put((key, payload))
+
+    def _flush_loop(self):
+        """
+        Drain up to batch_size queued entries (waiting at most flush_interval
+        for stragglers) and write them in one pipeline round trip.
         """
-        entry = data.copy()
-        entry["timestamp"] = time.time()
-        self.redis.lpush(key, json.dumps(entry))
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            pipe = self.redis.pipeline(transaction=False)
+            for key, payload in batch:
+                pipe.lpush(key, payload)
+            try:
+                pipe.execute()
+            except Exception as e:
+                logging.error(f"Error flushing {len(batch)} entries to Redis: {e}")
@@ -1,46 +1,48 @@
 # demand_supply_zones.py
 
-from collections import defaultdict
+import numpy as np
 
 MIN_ZONE_VOLUME_THRESHOLD = 0.10  # 10% of peak
 
 def aggregate_volumes(order_book_data):
-    demand, supply = defaultdict(float), defaultdict(float)
-    for item in order_book_data:
-        p = item.get("Price")
-        a = item.get("Amount", 0)
-        if p is None: 
-            continue
-        if a > 0:
-            demand[p] += a
-        elif a < 0:
-            supply[p] += abs(a)
-    return demand, supply
+    """
+    Bucket order-book amounts by price: positive amounts are demand,
+    negative amounts (as absolute values) are supply.
+    Returns (prices, demand_volumes, supply_volumes) as parallel arrays
+    over the sorted unique prices.
+    """
+    rows = [item for item in order_book_data if item.get("Price") is not None]
+    prices = np.fromiter((i["Price"] for i in rows), dtype=np.float64, count=len(rows))
+    amounts = np.fromiter((i.get("Amount", 0) for i in rows), dtype=np.float64, count=len(rows))
+    uniq, inv = np.unique(prices, return_inverse=True)
+    demand = np.bincount(inv, weights=np.where(amounts > 0, amounts, 0.0), minlength=uniq.size)
+    supply = np.bincount(inv, weights=np.where(amounts < 0, -amounts, 0.0), minlength=uniq.size)
+    return uniq, demand, supply
 
-def compute_zone_boundaries(volume_dict):
+def compute_zone_boundaries(prices, vols):
     """
     Select all buckets ≥ threshold×peak; if none, fall back to the single peak bucket.
+    Buckets with no volume on this side are ignored.
     Returns (low_price, high_price, total_volume).
     """
-    if not volume_dict:
+    present = vols > 0
+    if not present.any():
         return None
-    # find peak
-    peak_price = max(volume_dict, key=lambda p: volume_dict[p])
-    peak_vol   = volume_dict[peak_price]
-    thresh     = peak_vol * MIN_ZONE_VOLUME_THRESHOLD
+    prices, vols = prices[present], vols[present]
 
-    # select any bucket ≥ threshold
-    selected = [p for p, vol in volume_dict.items() if vol >= thresh]
-    if not selected:
+    peak_idx = int(vols.argmax())
+    peak_vol = float(vols[peak_idx])
+    mask = vols >= peak_vol * MIN_ZONE_VOLUME_THRESHOLD
+    if not mask.any():
         # fallback: single peak bucket
+        peak_price = float(prices[peak_idx])
         return peak_price, peak_price, peak_vol
-
-    total = sum(volume_dict[p] for p in selected)
-    return min(selected), max(selected), total
+    sel = prices[mask]
+    return float(sel.min()), float(sel.max()), float(vols[mask].sum())
 
 def calculate_zones(order_book_data):
-    demand, supply = aggregate_volumes(order_book_data)
+    prices, demand, supply = aggregate_volumes(order_book_data)
     return {
-        "demand_zone": compute_zone_boundaries(demand),
-        "supply_zone": compute_zone_boundaries(supply)
+        "demand_zone": compute_zone_boundaries(prices, demand),
+        "supply_zone": compute_zone_boundaries(prices, supply)
     }
@@ -1,14 +1,20 @@
-import redis
+import time
 import logging
+import redis_pool
 
 class EMACalculator:
-    def __init__(self, period: int, redis_key: str, redis_host: str = 'localhost', redis_port: int = 6379, redis_db: int = 0):
+    def __init__(self, period: int, redis_key: str, redis_host: str = 'localhost', redis_port: int = 6379, redis_db: int = 0,
+                 flush_interval: float = 1.0):
         self.period = period
         self.redis_key = redis_key
-        self.redis = redis.StrictRedis(host=redis_host, port=redis_port, db=redis_db, decode_responses=True)
+        self.redis = redis_pool.client(redis_host, redis_port, redis_db)
         self.multiplier = 2 / (period + 1)
         self.initialized = False
         self.current_ema = None
+        # The EMA lives in memory; Redis is written at most every flush_interval seconds.
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._last_flush = time.monotonic()
 
     def update(self, price: float) -> float:
         """
@@ -29,9 +35,22 @@ class EMACalculator:
             else:
                 self.current_ema = (price - self.current_ema) * self.multiplier + self.current_ema
 
-            self.redis.set(self.redis_key, self.current_ema)
-            logging.debug(f"Updated EMA ({self.redis_key}): {self.current_ema}")
+            self._dirty = True
+            if time.monotonic() - self._last_flush > self.flush_interval:
+                self.flush()
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(f"Updated EMA ({self.redis_key}): {self.current_ema}")
             return self.current_ema
         except Exception as e:
             logging.error(f"Error updating EMA ({self.redis_key}): {e}")
             return price  # fallback to current price if error occurs
+
+    def flush(self):
+        """
+        Write the current EMA to Redis if it changed since the last write.
+        Owners should call this on shutdown so the final value is kept.
+        """
+        if self._dirty:
+            self.redis.set(self.redis_key, self.current_ema)
+            self._dirty = False
+        self._last_flush = time.monotonic()
@@ -1,13 +1,13 @@
 import asyncio
 import logging
-from copy import deepcopy
-import redis
 import json
 from datetime import datetime
 from websocket_client import WebSocketClient
 from config import setup_logging
 from timeframe_processor import process_timeframe_without_rsi
+from additional_factors import ParsedCandle
 from binance_ws import BinanceWebsocket
+import redis_pool
 
 # Market‐wide factors
 from market_factors import (
@@ -28,8 +28,14 @@ CHANNELS = [
     "gdaxBCH-USD"
 ]
 TIMEFRAMES = ["15min", "5min"]
+AGG_KEYS = ("price", "vwap", "vol_imb", "bid_ask", "heatmap", "overall")
+EXTRAS_KEYS = ("divergence", "acc_dist", "volatility", "sentiment", "strength")
+# zeroed accumulators, copied (not rebuilt) at the start of every aggregator tick
+ZERO_AGG = dict.fromkeys(AGG_KEYS, 0.0)
+ZERO_EXTRAS = dict.fromkeys(EXTRAS_KEYS, 0.0)
 
-redis_client = redis.StrictRedis(host='localhost', port=6379, db=0, decode_responses=True)
+VOL_IMB_QUEUE_SIZE = 1024  # pending vol_imb lines before the oldest are dropped
+VOL_IMB_BATCH = 64         # max lines per RPUSH
 
 # Shared store for the latest data per channel
 data_store = {
@@ -41,6 +47,8 @@ data_store = {
 async def handle_channel(channel: str):
     ws = WebSocketClient(uri=URI, channel=channel)
     logging.info(f"Subscribed to: {channel}")
+    # tf -> (raw candle, parsed, record) from the last message, to skip unchanged candles
+    last = {tf: None for tf in TIMEFRAMES}
     async for msg in ws.connect():
         if msg.get("type") != "candle":
             continue
@@ -48,23 +56,36 @@ async def handle_channel(channel: str):
         data = msg["data"]
         closes = []
         vols = []
+        store = data_store[channel]
 
         for tf in TIMEFRAMES:
-            candle = data.get(tf, {})
-            if candle.get("close") is None:
-                data_store[channel][tf] = None
+            candle = data.get(tf)
+            if not candle or candle.get("close") is None:
+                store[tf] = last[tf] = None
                 continue
 
-            proc = process_timeframe_without_rsi(candle)
-            data_store[channel][tf] = {
-                "factors": proc["factors"],
-                "overall": proc["overall"]
-            }
+            prev = last[tf]
+            if prev is not None and prev[0] == candle:
+                # same candle as the previous message (common on 15min): reuse its result
+                _, parsed, rec = prev
+            else:
+                # parse the numeric fields once for every factor below
+                parsed = ParsedCandle.from_dict(candle)
+                if parsed.close is None:
+                    store[tf] = last[tf] = None
+                    continue
+                proc = process_timeframe_without_rsi(parsed)
+                rec = {
+                    "factors": proc["factors"],
+                    "overall": proc["overall"]
+                }
+                last[tf] = (candle, parsed, rec)
+            store[tf] = rec
 
-            closes.append(float(candle["close"]))
+            closes.append(parsed.close)
             if tf == "5min":
-                v = float(candle.get("volume", 0.0))
-                data_store[channel]["raw_vol"] = v
+                v = parsed.volume or 0.0
+                store["raw_vol"] = v
                 vols.append(v)
 
         extras = None
@@ -72,7 +93,7 @@ async def handle_channel(channel: str):
             div = price_divergence(closes, vols)
             acc = volume_accumulation_distribution(closes, vols)
             vol_idx = volatility_index(closes, closes, closes)
-            t15 = data_store[channel]["15min"]
+            t15 = store["15min"]
             sent = strg = 0.0
             if t15:
                 sent = market_sentiment_index(t15["overall"], div, acc)
@@ -84,112 +105,166 @@ async def handle_channel(channel: str):
                 "sentiment": sent,
                 "strength": strg
             }
-        data_store[channel]["extras"] = extras
+        store["extras"] = extras
+
+
+# Precompiled %-format templates for the [GLOBAL_ALL] line
+TF_FMT = (
+    "[%s] price:%+.2f%% & priceWS:%.1f  "
+    "vwap:%+.2f%%  vol_imb:%+.2f%%  delta_vi:%+.2f%%  "
+    "bid_ask:%+.2f%%  heatmap:%+.2f%%"
+)
+EXTRAS_FMT = (
+    "div:%+.2f%%  acc_dist:%+.2f  "
+    "volatility:%+.2f%%  sent:%+.2f%%  "
+    "str:%+.2f%%"
+)
+GLOBAL_FMT = "[GLOBAL_ALL]  %s  |  raw_vol_5min_sum:%.4f  |  MultiTF:%+.2f%%  |  %s"
+
+
+def format_global_line(snap: dict, delta_vi: dict, price_ws: float) -> str:
+    parts = []
+    for tf in TIMEFRAMES:
+        f = snap["tf"][tf]
+        parts.append(TF_FMT % (
+            tf, f["price"], price_ws, f["vwap"], f["vol_imb"], delta_vi[tf],
+            f["bid_ask"], f["heatmap"]
+        ))
+    e = snap["extras"]
+    extras_str = EXTRAS_FMT % (
+        e["divergence"], e["acc_dist"], e["volatility"], e["sentiment"], e["strength"]
+    )
+    return GLOBAL_FMT % ("  |  ".join(parts), snap["raw_vol_sum"], snap["MultiTF"], extras_str)
+
+
+def enqueue_drop_oldest(q: asyncio.Queue, item):
+    """
+    put_nowait, discarding the oldest entry when the queue is full.
+    """
+    try:
+        q.put_nowait(item)
+    except asyncio.QueueFull:
+        q.get_nowait()
+        q.put_nowait(item)
+        logging.warning("vol_imb queue full; dropped oldest line")
+
+
+async def redis_publisher(q: asyncio.Queue):
+    """
+    Drain vol_imb lines from q and RPUSH whatever is pending in one call,
+    so Redis latency never stalls the aggregator.
+    """
+    aredis = redis_pool.async_client()
+    try:
+        while True:
+            items = [await q.get()]
+            while len(items) < VOL_IMB_BATCH and not q.empty():
+                items.append(q.get_nowait())
+            try:
+                await aredis.rpush("vol_imb", *items)
+            except Exception as e:
+                logging.error(f"Error pushing {len(items)} vol_imb lines to Redis: {e}")
+    finally:
+        await aredis.aclose()
 
 
-async def global_aggregator():
+async def global_aggregator(pub_q: asyncio.Queue):
     binance_ws = BinanceWebsocket()
     binance_ws.start()
 
-    last_snapshot = None
+    last_sig = None
     last_vol_imb = {tf: 0.0 for tf in TIMEFRAMES}
 
     while True:
         await asyncio.sleep(1)
 
-        agg = {
-            tf: {k: [] for k in ("price","vwap","vol_imb","bid_ask","heatmap","overall")}
-            for tf in TIMEFRAMES
-        }
+        sums = {tf: ZERO_AGG.copy() for tf in TIMEFRAMES}
+        counts = dict.fromkeys(TIMEFRAMES, 0)
         raw_sum = 0.0
-        extras_acc = {k: [] for k in ("divergence","acc_dist","volatility","sentiment","strength")}
+        extras_sums = ZERO_EXTRAS.copy()
+        extras_count = 0
 
         for ch in CHANNELS:
             for tf in TIMEFRAMES:
                 rec = data_store[ch][tf]
                 if rec:
                     f = rec["factors"]
-                    agg[tf]["price"].append(f["price"])
-                    agg[tf]["vwap"].append(f["vwap"])
-                    agg[tf]["vol_imb"].append(f["volume"])
-                    agg[tf]["bid_ask"].append(f["bid_ask"])
-                    agg[tf]["heatmap"].append(f["heatmap"])
-                    agg[tf]["overall"].append(rec["overall"])
+                    s = sums[tf]
+                    s["price"] += f["price"]
+                    s["vwap"] += f["vwap"]
+                    s["vol_imb"] += f["volume"]
+                    s["bid_ask"] += f["bid_ask"]
+                    s["heatmap"] += f["heatmap"]
+                    s["overall"] += rec["overall"]
+                    counts[tf] += 1
             raw_sum += data_store[ch]["raw_vol"] or 0.0
             ex = data_store[ch]["extras"]
             if ex:
-                for k in extras_acc:
-                    extras_acc[k].append(ex[k])
+                for k in EXTRAS_KEYS:
+                    extras_sums[k] += ex[k]
+                extras_count += 1
 
-        snap = {"tf": {}, "raw_vol_sum": raw_sum, "extras": {}, "MultiTF": 0.0}
-        for tf in TIMEFRAMES:
-            snap["tf"][tf] = {
-                k: (sum(vs)/len(vs) if vs else 0.0)
-                for k, vs in agg[tf].items()
-            }
-
-        for k, vs in extras_acc.items():
-            snap["extras"][k] = (sum(vs)/len(vs)) if vs else 0.0
+        # flat tuple of everything the snapshot is derived from; the dicts and
+        # the log line are only built when it differs from the last tick
+        sig = (raw_sum, extras_count, *counts.values(),
+               *(v for tf in TIMEFRAMES for v in sums[tf].values()),
+               *extras_sums.values())
+        if sig != last_sig:
+            last_sig = sig
 
-        all_over = []
-        for tf in TIMEFRAMES:
-            all_over.extend(agg[tf]["overall"])
-        snap["MultiTF"] = (sum(all_over)/len(all_over)) if all_over else 0.0
+            snap = {"tf": {}, "raw_vol_sum": raw_sum, "extras": {}, "MultiTF": 0.0}
+            for tf in TIMEFRAMES:
+                n = counts[tf]
+                snap["tf"][tf] = {
+                    k: (v/n if n else 0.0)
+                    for k, v in sums[tf].items()
+                }
 
-        if snap != last_snapshot:
-            last_snapshot = deepcopy(snap)
+            for k, v in extras_sums.items():
+                snap["extras"][k] = (v/extras_count) if extras_count else 0.0
 
-            # grab live price
-            with binance_ws._lock:
-                price_ws = binance_ws.current_price or 0.0
+            n_over = sum(counts.values())
+            snap["MultiTF"] = (sum(sums[tf]["overall"] for tf in TIMEFRAMES)/n_over) if n_over else 0.0
 
-            parts = []
+            delta_vi = {}
             for tf in TIMEFRAMES:
-                f = snap["tf"][tf]
-                cur_v = f["vol_imb"]
-                d_v = cur_v - last_vol_imb[tf]
+                cur_v = snap["tf"][tf]["vol_imb"]
+                delta_vi[tf] = cur_v - last_vol_imb[tf]
                 last_vol_imb[tf] = cur_v
 
-                parts.append(
-                    f"[{tf}] price:{f['price']:+.2f}% & priceWS:{price_ws:.1f}  "
-                    f"vwap:{f['vwap']:+.2f}%  vol_imb:{cur_v:+.2f}%  delta_vi:{d_v:+.2f}%  "
-                    f"bid_ask:{f['bid_ask']:+.2f}%  heatmap:{f['heatmap']:+.2f}%"
-                )
-
-            e = snap["extras"]
-            extras_str = (
-                f"div:{e['divergence']:+.2f}%  acc_dist:{e['acc_dist']:+.2f}  "
-                f"volatility:{e['volatility']:+.2f}%  sent:{e['sentiment']:+.2f}%  "
-                f"str:{e['strength']:+.2f}%"
-            )
-
-            log_line = (
-                "[GLOBAL_ALL]  " +
-                "  |  ".join(parts) +
-                f"  |  raw_vol_5min_sum:{snap['raw_vol_sum']:.4f}  "
-                f"|  MultiTF:{snap['MultiTF']:+.2f}%  "
-                f"|  {extras_str}"
-            )
-            logging.info(log_line)
-
             # only write if any vol_imb >±95% or delta_vi >±50%
             trigger = any(
-                abs(snap["tf"][tf]["vol_imb"]) > 95
-                or abs((snap["tf"][tf]["vol_imb"] - (last_snapshot["tf"][tf]["vol_imb"]
-                    if last_snapshot else 0))) > 50
+                abs(snap["tf"][tf]["vol_imb"]) > 95 or abs(delta_vi[tf]) > 50
                 for tf in TIMEFRAMES
             )
-            if trigger:
-                ts = datetime.utcnow().isoformat()
-                redis_client.rpush("vol_imb", f"{ts} {log_line}")
+
+            # the line is only needed if it will be logged or stored
+            log_info = logging.getLogger().isEnabledFor(logging.INFO)
+            if log_info or trigger:
+                # grab live price
+                with binance_ws._lock:
+                    price_ws = binance_ws.current_price or 0.0
+                log_line = format_global_line(snap, delta_vi, price_ws)
+                if log_info:
+                    logging.info(log_line)
+                if trigger:
+                    ts = datetime.utcnow().isoformat()
+                    enqueue_drop_oldest(pub_q, f"{ts} {log_line}")
 
 
 async def main():
     setup_logging()
+    pub_q = asyncio.Queue(maxsize=VOL_IMB_QUEUE_SIZE)
     tasks = [asyncio.create_task(handle_channel(ch)) for ch in CHANNELS]
-    tasks.append(asyncio.create_task(global_aggregator()))
+    tasks.append(asyncio.create_task(global_aggregator(pub_q)))
+    tasks.append(asyncio.create_task(redis_publisher(pub_q)))
     await asyncio.gather(*tasks)
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # optional; libuv loop for the websocket fan-in
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -1,5 +1,7 @@
 # market_factors.py
 
+import numpy as np
+
 def price_divergence(prices: list, volumes: list) -> float:
     """
     (Δprice / Δvolume) * 100
@@ -17,21 +19,28 @@ def volume_accumulation_distribution(prices: list, volumes: list) -> float:
     if len(prices) < 2 or len(volumes) < 2:
         return 0.0
     total = 0.0
-    for i in range(1, len(prices)):
-        total += volumes[i] if prices[i] > prices[i-1] else -volumes[i]
+    for prev, cur, v in zip(prices, prices[1:], volumes[1:]):
+        total += v if cur > prev else -v
     return total
 
 def order_book_cluster_analysis(order_book: dict, threshold: float = 0.05) -> dict:
     """
-    Find buy/sell clusters where volume ≥ threshold.
+    Find buy/sell clusters where volume ≥ threshold: levels below the median
+    book price are buy clusters, levels above it sell clusters.
     """
     if not order_book:
         return {"buy": [], "sell": []}
-    prices = sorted(order_book)
-    low, high = prices[0], prices[-1]
-    buy = [(p, v) for p, v in order_book.items() if p < low and v >= threshold]
-    sell = [(p, v) for p, v in order_book.items() if p > high and v >= threshold]
-    return {"buy": buy, "sell": sell}
+    n = len(order_book)
+    prices = np.fromiter(order_book.keys(), dtype=np.float64, count=n)
+    vols = np.fromiter(order_book.values(), dtype=np.float64, count=n)
+    pivot = np.median(prices)
+    heavy = vols >= threshold
+    buy = heavy & (prices < pivot)
+    sell = heavy & (prices > pivot)
+    return {
+        "buy": list(zip(prices[buy].tolist(), vols[buy].tolist())),
+        "sell": list(zip(prices[sell].tolist(), vols[sell].tolist())),
+    }
 
 def support_resistance_levels(order_book: dict, current_price: float, threshold: float = 0.05) -> dict:
     """
@@ -49,8 +58,11 @@ def volatility_index(highs: list, lows: list, closes: list) -> float:
     """
     if not highs or not lows or not closes or len(highs) != len(lows) != len(closes):
         return 0.0
-    vals = [(h - l) / c * 100 if c else 0.0 for h, l, c in zip(highs, lows, closes)]
-    return sum(vals) / len(vals)
+    total = 0.0
+    for h, l, c in zip(highs, lows, closes):
+        if c:
+            total += (h - l) / c
+    return total * 100 / len(highs)
 
 def market_sentiment_index(price_trend: float, order_imbalance: float, volume_imbalance: float) -> float:
     """
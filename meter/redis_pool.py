@@ -0,0 +1,43 @@
+# redis_pool.py
+
+import threading
+import redis
+import redis.asyncio
+
+MAX_CONNECTIONS = 32
+
+_POOLS = {}
+_lock = threading.Lock()
+
+def get_pool(host='localhost', port=6379, db=0) -> redis.ConnectionPool:
+    """
+    Return the process-wide connection pool for (host, port, db), creating it on first use.
+    """
+    key = (host, port, db)
+    with _lock:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = redis.ConnectionPool(
+                host=host, port=port, db=db,
+                decode_responses=True, max_connections=MAX_CONNECTIONS
+            )
+        return pool
+
+# Default local Redis, used by every component unless told otherwise.
+POOL = get_pool()
+
+def client(host='localhost', port=6379, db=0) -> redis.StrictRedis:
+    """
+    Redis client backed by the shared pool for (host, port, db).
+    """
+    return redis.StrictRedis(connection_pool=get_pool(host, port, db))
+
+def async_client(host='localhost', port=6379, db=0) -> redis.asyncio.Redis:
+    """
+    asyncio Redis client for coroutines. Its pool is bound to the running
+    event loop, so create it inside the loop that uses it.
+    """
+    return redis.asyncio.Redis(
+        host=host, port=port, db=db,
+        decode_responses=True, max_connections=MAX_CONNECTIONS
+    )
@@ -1,9 +1,20 @@
 import time
+import heapq
+import itertools
 import logging
+from collections import deque
+
+WINDOW = 3600  # seconds of order history kept
 
 class OrderTracker:
+    """
+    Orders from the last hour, oldest first, plus a max-heap by size
+    so the largest recent order is found without a full scan.
+    """
     def __init__(self):
-        self.orders = []
+        self.orders = deque()
+        self._heap = []  # (-size, seq, order)
+        self._seq = itertools.count()
 
     def add_order(self, size, leverage, side):
         current_time = time.time()
@@ -13,16 +24,24 @@ class OrderTracker:
             'side': side,
             'timestamp': current_time
         }
+        cutoff = current_time - WINDOW
+        while self.orders and self.orders[0]['timestamp'] <= cutoff:
+            self.orders.popleft()
         self.orders.append(order)
+        heapq.heappush(self._heap, (-size, next(self._seq), order))
+        # expired entries buried under a larger recent one are only popped once
+        # they surface; rebuild if they start to dominate the heap
+        if len(self._heap) > 2 * len(self.orders) + 64:
+            self._heap = [e for e in self._heap if e[2]['timestamp'] > cutoff]
+            heapq.heapify(self._heap)
         logging.info(f"Order added: {size} BTC, {leverage}x, Side: {side}, Time: {current_time}")
 
     def get_largest_order_last_hour(self):
-        current_time = time.time()
-        one_hour_ago = current_time - 3600
-        recent_orders = [order for order in self.orders if order['timestamp'] > one_hour_ago]
-        if not recent_orders:
-            return None
-        return max(recent_orders, key=lambda x: x['size'])
+        one_hour_ago = time.time() - WINDOW
+        heap = self._heap
+        while heap and heap[0][2]['timestamp'] <= one_hour_ago:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
 
 order_tracker = OrderTracker()
 
@@ -1,6 +1,7 @@
 # timeframe_processor.py
 
 from additional_factors import (
+    ParsedCandle,
     candle_range_percent,
     bid_ask_percent,
     heatmap_flow_percent,
@@ -8,20 +9,19 @@ from additional_factors import (
     heatmap_buy_sell_ratio
 )
 
-def simple_price_trend_percent(candle: dict) -> float:
-    try:
-        o, c = float(candle.get("open", 0)), float(candle.get("close", 0))
-        return ((c - o) / o) * 100 if o else 0.0
-    except:
+def simple_price_trend_percent(candle: ParsedCandle) -> float:
+    o, c = candle.open, candle.close
+    if c is None or not o:
         return 0.0
+    return ((c - o) / o) * 100
 
 # timeframe_processor.py (only vwap_trend_percent changed)
 
 # timeframe_processor.py (vwap only)
 
-def vwap_trend_percent(candle_data: dict) -> float:
-    close = float(candle_data.get("close", 0))
-    vwap  = float(candle_data.get("vwap", 0))
+def vwap_trend_percent(candle_data: ParsedCandle) -> float:
+    close = candle_data.close or 0.0
+    vwap  = candle_data.vwap or 0.0
     if abs(vwap) < 1e-6:
         return 0.0
     pct = ((close - vwap) / vwap) * 100
@@ -30,20 +30,21 @@ def vwap_trend_percent(candle_data: dict) -> float:
 
 
 
-def volume_imbalance_percent(candle: dict) -> float:
-    try:
-        buy = float(candle.get("buyVolume", 0))
-        sell = float(candle.get("sellVolume", 0))
-        total = buy + sell
-        return ((buy - sell) / total) * 100 if total else 0.0
-    except:
+def volume_imbalance_percent(candle: ParsedCandle) -> float:
+    buy, sell = candle.buyVolume, candle.sellVolume
+    if buy is None or sell is None:
         return 0.0
+    total = buy + sell
+    return ((buy - sell) / total) * 100 if total else 0.0
 
-def process_timeframe_without_rsi(candle: dict) -> dict:
+def process_timeframe_without_rsi(candle: ParsedCandle) -> dict:
     """
     Returns per‐TF metrics:
       price, vwap, volume, bid_ask, heatmap, heatmap_delta, heatmap_buy_sell, overall
+    A raw candle dict is accepted too and parsed here.
     """
+    if not isinstance(candle, ParsedCandle):
+        candle = ParsedCandle.from_dict(candle)
     price_pct      = simple_price_trend_percent(candle)
     vwap_pct       = vwap_trend_percent(candle)
     volume_pct     = volume_imbalance_percent(candle)
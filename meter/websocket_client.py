@@ -1,12 +1,30 @@
 # websocket_client.py
 
 import asyncio
+import inspect
 import websockets
 import json
 import logging
 import argparse
 import sys
 
+try:
+    import orjson
+    _loads = orjson.loads  # orjson.JSONDecodeError subclasses json.JSONDecodeError
+except ImportError:  # orjson is optional; fall back to stdlib json
+    _loads = json.loads
+
+async def _raw_frames(ws):
+    """
+    Yield frame payloads as bytes, skipping the UTF-8 decode of text frames;
+    the JSON parser validates the payload anyway.
+    """
+    while True:
+        try:
+            yield await ws.recv(decode=False)
+        except websockets.ConnectionClosedOK:
+            return
+
 class WebSocketClient:
     """
     Connects to a WebSocket URI and subscribes to a single channel.
@@ -22,13 +40,15 @@ class WebSocketClient:
         retry = 0
         while retry < self.max_retries:
             try:
-                async with websockets.connect(self.uri) as ws:
+                async with websockets.connect(self.uri, compression=None) as ws:
                     await ws.send(json.dumps({"type": "reg", "channel": self.channel}))
                     logging.info(f"Subscribed to: {self.channel}")
-                    async for raw in ws:
+                    # recv(decode=False) only exists on the newer asyncio implementation
+                    raw_bytes = "decode" in inspect.signature(ws.recv).parameters
+                    async for raw in (_raw_frames(ws) if raw_bytes else ws):
                         try:
-                            yield json.loads(raw)
-                        except json.JSONDecodeError:
+                            yield _loads(raw)
+                        except (json.JSONDecodeError, UnicodeDecodeError):
                             logging.warning(f"[{self.channel}] Non-JSON message skipped")
                 return
             except Exception as e: